@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Single-pass post-processing engine for generated Astro pages
+Fixes are registered as transforms and run in order on each file's text
+in memory, so every file is read once and written at most once, and only
+when a transform actually changed it. Files are transformed in parallel
+and the changes written together at the end
+"""
+
+import glob
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from output_writer import OutputWriter
+from metrics import metrics
+
+# (name, function) in the order they run; function(content, filepath) -> content
+TRANSFORMS = []
+
+FENCE = re.compile(r'^---\s*$', re.M)
+CONFLICT_MARKER = re.compile(r'^(?:<<<<<<<|>>>>>>>) ', re.M)
+SET_HTML = re.compile(r'<div set:html=(.*?) />[ \t]*$', re.S | re.M)
+# A quoted title whose closing quote is on a later line, or an unquoted one
+# followed by lines that aren't frontmatter keys
+BROKEN_TITLE = re.compile(r'''^title:[ \t]*(?:(["'])([^"'\n]*)\n[^"']*?\1|([^"'\n]*)\n(?:(?!---|\w+:)[^\n]*\n)+)''', re.M)
+TITLE_LINE = re.compile(r'title:\s*["\']?[^"\'\n]*["\']?')
+FRONTMATTER = re.compile(r'\A---[ \t]*\n(.*?)^---[ \t]*$', re.S | re.M)
+YAML_KEY = re.compile(r'^[\w-]+:(?:[ \t][^\n]*)?\n', re.M)
+
+def transform(name):
+    """Register a transform under `name`, to run after those registered before it"""
+    def register(func):
+        TRANSFORMS.append((name, func))
+        return func
+    return register
+
+def find_title(content):
+    """Return the page title from frontmatter or a `const title`, unescaped, or None"""
+    match = (re.search(r'title:\s*"((?:[^"\\\n]|\\.)*)"', content)
+             or re.search(r"title:\s*'((?:[^'\\\n]|\\.)*)'", content)
+             or re.search(r'title:\s*([^"\'\n]+)', content)
+             or re.search(r'const title = "((?:[^"\\\n]|\\.)*)"', content))
+    if not match:
+        return None
+    return re.sub(r'\\(.)', r'\1', match.group(1)).strip() or None
+
+def escape_title(title):
+    return title.replace('"', '\\"').replace("'", "\\'")
+
+def layout_import_path(filepath):
+    """Relative import of src/layouts/Layout.astro from a file under src/pages"""
+    parts = os.path.normpath(filepath).split(os.sep)[:-1]
+    # Directories below the last 'pages' one, e.g. 1 for src/pages/services/cooling.astro
+    depth = parts[::-1].index('pages') if 'pages' in parts else 0
+    return '../' * (depth + 1) + 'layouts/Layout.astro'
+
+def placeholder_html(title):
+    return (f"<div class='ct-section'><div class='ct-section-inner-wrap'>"
+            f"<h2 class='ct-headline'>{escape_title(title)}</h2><p>Content coming soon...</p></div></div>")
+
+def template_literal(value):
+    """Return a set:html value as a {`...`} template literal expression"""
+    value = value.strip()
+    if value.startswith('{') and value.endswith('}'):
+        return value  # already an expression
+    if len(value) > 1 and value.startswith('`') and value.endswith('`'):
+        return '{' + value + '}'
+    value = value.replace('\\', '\\\\').replace('`', '\\`').replace('${', '\\${')
+    return '{`' + value + '`}'
+
+@transform('collapse-duplicates')
+def collapse_duplicates(content, filepath):
+    """Rebuild pages whose frontmatter was duplicated (was cleanup-pages.py)"""
+    if len(FENCE.findall(content)) <= 2 and content.count('import Layout') <= 1:
+        return content
+    title = find_title(content)
+    if not title:
+        return content
+    escaped_title = escape_title(title)
+    return f"""---
+import Layout from '{layout_import_path(filepath)}';
+
+const title = "{escaped_title}";
+const description = '';
+---
+
+<Layout {{title}} {{description}}>
+  <div class="prose max-w-none">
+    <h1>{escaped_title}</h1>
+    <div set:html={{`{placeholder_html(title)}`}} />
+  </div>
+</Layout>"""
+
+@transform('template-literal-html')
+def template_literal_html(content, filepath):
+    """Quote titles with markup characters and pass set:html a template literal (was fix-astro-files.py)"""
+    if 'set:html=' not in content:
+        return content
+    if re.search(r'title: [^"\'][^"\n]*[&<>]', content):
+        content = re.sub(r'title: ([^"\'\n]+)', r'title: "\1"', content, count=1)
+    return SET_HTML.sub(lambda match: f"<div set:html={template_literal(match.group(1))} />", content)
+
+@transform('single-line-titles')
+def single_line_titles(content, filepath):
+    """Collapse titles that were split over several lines (was fix-titles.py)"""
+    match = BROKEN_TITLE.search(content)
+    if not match:
+        return content
+    # Keep the part before the first line break
+    clean_title = (match.group(2) if match.group(1) else match.group(3)).strip()
+    if not clean_title:
+        return content
+    replacement = f'title: "{clean_title}"' + ('' if match.group(1) else '\n')
+    content = content[:match.start()] + replacement + content[match.end():]
+    content = re.sub(r'<h1>[^<]*\n[^<]*</h1>', lambda _: f'<h1>{clean_title}</h1>', content)
+    return re.sub(r'<h2 class=\'ct-headline\'>[^<]*\n[^<]*</h2>',
+                  lambda _: f"<h2 class='ct-headline'>{clean_title}</h2>", content)
+
+@transform('layout-props')
+def layout_props(content, filepath):
+    """Quote the title, make sure there is content and pass title/description to Layout (was fix-all-pages.py)"""
+    title = find_title(content)
+    if not title:
+        return content
+    escaped_title = escape_title(title)
+
+    content = TITLE_LINE.sub(lambda _: f'title: "{escaped_title}"', content, count=1)
+
+    match = SET_HTML.search(content)
+    if match is None:
+        content = re.sub(r'<h1>.*?</h1>',
+                         lambda _: f'<h1>{escaped_title}</h1>\n    <div set:html={{`{placeholder_html(title)}`}} />',
+                         content, count=1)
+    elif match.group(1).strip() in ('', '=', '{``}', '``'):
+        content = (content[:match.start()] + f"<div set:html={{`{placeholder_html(title)}`}} />"
+                   + content[match.end():])
+
+    if 'import Layout from' not in content:
+        # The frontmatter becomes code, so its YAML keys give way to the
+        # title/description consts rather than staying behind as stray labels
+        header = (f"---\nimport Layout from '{layout_import_path(filepath)}';\n\n"
+                  f"const title = \"{escaped_title}\";\nconst description = '';")
+        match = FRONTMATTER.match(content)
+        if match:
+            content = header + '\n' + YAML_KEY.sub('', match.group(1)) + content[match.end(1):]
+        else:
+            # Only the opening fence, the closing one must stay as it is
+            content = content.replace('---', header, 1)
+        content = content.replace('<Layout>', '<Layout {title} {description}>')
+    return content
+
+def apply_transforms(filepath, names=None):
+    """Run the transforms on one file in memory
+
+    Returns (filepath, names of transforms that changed it, the new content
+    or None if unchanged, error, metrics recorded in this worker).
+    """
+    result = transform_file(filepath, names)
+    return (*result, metrics.take())
+
+def transform_file(filepath, names):
+    """apply_transforms() without the metrics"""
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            original = f.read()
+        if CONFLICT_MARKER.search(original):
+            return filepath, [], None, "unresolved merge conflict, left untouched"
+
+        content = original
+        applied = []
+        for name, func in TRANSFORMS:
+            if names and name not in names:
+                continue
+            start = time.perf_counter()
+            updated = func(content, filepath)
+            metrics.observe('transform_seconds', time.perf_counter() - start, transform=name)
+            if updated != content:
+                applied.append(name)
+                content = updated
+
+        return filepath, applied, content if content != original else None, None
+    except Exception as e:
+        return filepath, [], None, str(e)
+
+def find_astro_files(paths):
+    """Every .astro file under `paths`, nested directories included"""
+    files = []
+    for path in paths:
+        if os.path.isfile(path):
+            files.append(path)
+        else:
+            files.extend(glob.glob(os.path.join(path, '**', '*.astro'), recursive=True))
+    return sorted(set(files))
+
+def process_pages(paths=("src/pages",), names=None, workers=None, dry_run=False):
+    """Apply the registered transforms to every Astro file under `paths` across processes
+
+    Returns the number of files changed.
+    """
+    unknown = set(names or ()) - {name for name, _ in TRANSFORMS}
+    if unknown:
+        raise ValueError(f"Unknown transforms: {', '.join(sorted(unknown))}")
+
+    files = find_astro_files(paths)
+    print(f"Found {len(files)} Astro files to check")
+
+    changed = 0
+    writer = OutputWriter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(apply_transforms, files, [names] * len(files), chunksize=16)
+        for filepath, applied, content, error, worker_metrics in results:
+            metrics.merge(worker_metrics)
+            if error:
+                print(f"  ❌ {filepath}: {error}")
+            elif content is not None:
+                changed += 1
+                if not dry_run:
+                    writer.write(filepath, content)
+                print(f"  ✅ {'Would fix' if dry_run else 'Fixed'} {filepath} ({', '.join(applied)})")
+    writer.flush()
+
+    print(f"\n✅ {'Would fix' if dry_run else 'Fixed'} {changed} of {len(files)} Astro files")
+    return changed
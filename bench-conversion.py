@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+End-to-end conversion benchmark against a local stand-in WordPress site
+  run       convert the stand-in site with each converter and record wall
+            time, requests, bytes, peak RSS and per-stage timings
+  compare   show two recorded runs side by side (default: the last two)
+  serve     just run the stand-in site, for manual testing
+Results are appended to .cache/benchmarks.jsonl with the git commit they ran on
+"""
+
+import argparse
+import json
+import os
+import re
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from bench_site import StandInServer, StandInSite
+
+DEFAULT_RESULTS_PATH = ".cache/benchmarks.jsonl"
+CONVERTERS = {
+    'wordpress': ('wordpress-converter.py', []),
+    # The stand-in server has no rate limit to respect
+    'scrape': ('scrape-converter.py', ['--rate', '0']),
+}
+# Converters announce each stage on a line like "📝 Converting posts..."
+STAGE_LINE = re.compile(r'^[^\w\s]+\s*(.+?)\.\.\.$')
+METRICS = [
+    ('wall_seconds', "Wall time", "{:.2f} s"),
+    ('requests', "Requests", "{:,}"),
+    ('megabytes', "Transferred", "{:.2f} MB"),
+    ('peak_rss_mb', "Peak RSS", "{:.0f} MB"),
+]
+
+def git_revision():
+    """(short commit, whether the tree has uncommitted changes), or (None, False) outside git"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True,
+                                text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None, False
+    return commit, bool(status.strip())
+
+def stage_name(line):
+    """Stage announced by an output line, with counts dropped so runs line up"""
+    match = STAGE_LINE.match(line.rstrip())
+    if not match:
+        return None
+    return re.sub(r'\s+', ' ', re.sub(r'\b\d[\d,]*\b', '', match.group(1))).strip()
+
+def run_converter(name, server, extra_args, keep):
+    """Convert the stand-in site in a scratch directory and measure it"""
+    script, default_args = CONVERTERS[name]
+    script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), script)
+    workdir = tempfile.mkdtemp(prefix=f"bench-{name}-")
+    metrics_path = os.path.join(workdir, 'metrics.json')
+    command = [sys.executable, script_path, server.base_url, *default_args, '--metrics', metrics_path, *extra_args]
+
+    server.reset_counters()
+    stages = {}
+    current, stage_start = None, None
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=workdir, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                               text=True, encoding='utf-8', errors='replace')
+    log_path = os.path.join(workdir, 'benchmark.log')
+    with open(log_path, 'w', encoding='utf-8') as log:
+        for line in process.stdout:
+            log.write(line)
+            name_of_stage = stage_name(line)
+            if name_of_stage:
+                now = time.perf_counter()
+                if current:
+                    stages[current] = stages.get(current, 0) + now - stage_start
+                current, stage_start = name_of_stage, now
+    # wait4 reports the peak RSS of the converter, including pool workers it waited for
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    wall = time.perf_counter() - start
+    if current:
+        stages[current] = stages.get(current, 0) + time.perf_counter() - stage_start
+
+    result = {
+        'exit_code': process.returncode,
+        'wall_seconds': round(wall, 3),
+        'requests': server.requests,
+        'megabytes': round(server.bytes_sent / 1024 / 1024, 3),
+        'peak_rss_mb': round(usage.ru_maxrss / 1024, 1),
+        'cpu_seconds': round(usage.ru_utime + usage.ru_stime, 3),
+        'stages': {stage: round(seconds, 3) for stage, seconds in stages.items()},
+        'timings': metric_timings(metrics_path),
+    }
+    if process.returncode != 0:
+        print(f"  ❌ {name} exited with {process.returncode}, see {log_path}")
+        keep = True
+    if keep:
+        result['workdir'] = workdir
+    else:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return result
+
+def metric_timings(path):
+    """Total seconds per timing histogram in a converter's --metrics summary"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        summary = json.load(f)
+    timings = {}
+    for histogram in summary['histograms']:
+        labels = ','.join(f"{key}={value}" for key, value in histogram['labels'].items())
+        timings[f"{histogram['name']}{{{labels}}}" if labels else histogram['name']] = round(histogram['sum'], 3)
+    return timings
+
+def print_result(name, result):
+    print(f"\n📊 {name}")
+    for key, label, template in METRICS:
+        print(f"   {label:<12} {template.format(result[key])}")
+    for stage, seconds in result['stages'].items():
+        print(f"   {'':<12} {seconds:8.2f} s  {stage}")
+    for timing, seconds in result.get('timings', {}).items():
+        print(f"   {'':<12} {seconds:8.2f} s  {timing}")
+
+def load_results(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def find_record(records, ref):
+    """A record by index (-1 is the latest) or commit/label prefix"""
+    if re.fullmatch(r'-?\d+', ref):
+        return records[int(ref)]
+    for record in reversed(records):
+        if (record.get('commit') or '').startswith(ref) or record.get('label') == ref:
+            return record
+    raise SystemExit(f"No recorded run matches {ref}")
+
+def describe(record):
+    commit = record.get('commit') or 'no commit'
+    dirty = '+changes' if record.get('dirty') else ''
+    label = f" ({record['label']})" if record.get('label') else ''
+    return f"{commit}{dirty}{label} {record['posts']} posts, {record['time']}"
+
+def compare(records, before_ref, after_ref):
+    before, after = find_record(records, before_ref), find_record(records, after_ref)
+    print(f"Before: {describe(before)}")
+    print(f"After:  {describe(after)}")
+    for name in after['converters']:
+        if name not in before['converters']:
+            continue
+        old, new = before['converters'][name], after['converters'][name]
+        print(f"\n📊 {name}")
+        rows = [(label, old[key], new[key], template) for key, label, template in METRICS]
+        rows += [(stage, old['stages'].get(stage, 0), seconds, "{:.2f} s") for stage, seconds in new['stages'].items()]
+        rows += [(timing, old.get('timings', {}).get(timing, 0), seconds, "{:.2f} s")
+                 for timing, seconds in new.get('timings', {}).items()]
+        for label, old_value, new_value, template in rows:
+            change = f"{(new_value - old_value) / old_value * 100:+.1f}%" if old_value else ''
+            print(f"   {label[:34]:<34} {template.format(old_value):>12} -> {template.format(new_value):>12}  {change}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the converters end to end against a local site")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run = subparsers.add_parser('run', help="Benchmark the converters and record the results")
+    run.add_argument('--posts', type=int, default=500, help="Synthetic posts to serve (default: 500)")
+    run.add_argument('--converters', default='wordpress,scrape',
+                     help="Comma-separated converters to run (default: wordpress,scrape)")
+    run.add_argument('--wordpress-args', default='', help="Extra wordpress-converter.py arguments, e.g. '--workers 4'")
+    run.add_argument('--scrape-args', default='', help="Extra scrape-converter.py arguments, e.g. '--concurrency 8'")
+    run.add_argument('--label', help="Name for this run, usable with compare")
+    run.add_argument('--keep', action='store_true', help="Keep each converter's output directory")
+    run.add_argument('--results', default=DEFAULT_RESULTS_PATH, help=f"Results file (default: {DEFAULT_RESULTS_PATH})")
+
+    compare_parser = subparsers.add_parser('compare', help="Compare two recorded runs")
+    compare_parser.add_argument('before', nargs='?', default='-2', help="Index, commit or label (default: -2)")
+    compare_parser.add_argument('after', nargs='?', default='-1', help="Index, commit or label (default: -1)")
+    compare_parser.add_argument('--results', default=DEFAULT_RESULTS_PATH)
+
+    serve = subparsers.add_parser('serve', help="Run the stand-in site until interrupted")
+    serve.add_argument('--posts', type=int, default=500)
+    serve.add_argument('--port', type=int, default=8080)
+    args = parser.parse_args()
+
+    if args.command == 'compare':
+        records = load_results(args.results)
+        if len(records) < 2 and (args.before, args.after) == ('-2', '-1'):
+            raise SystemExit(f"Need two recorded runs in {args.results} to compare")
+        compare(records, args.before, args.after)
+        return
+
+    print(f"🌐 Building stand-in site with {args.posts} posts...")
+    server = StandInServer(StandInSite(args.posts), getattr(args, 'port', 0))
+    print(f"   Serving {len(server.site.pages)} pages, {len(server.site.posts)} posts and "
+          f"{len(server.site.media)} images at {server.base_url}")
+    if args.command == 'serve':
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    server.start()
+    names = [name.strip() for name in args.converters.split(',') if name.strip()]
+    unknown = set(names) - set(CONVERTERS)
+    if unknown:
+        raise SystemExit(f"Unknown converters: {', '.join(sorted(unknown))}")
+    commit, dirty = git_revision()
+    record = {
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'dirty': dirty,
+        'label': args.label,
+        'posts': args.posts,
+        'python': sys.version.split()[0],
+        'converters': {},
+    }
+    try:
+        for name in names:
+            print(f"⏱️  Running {name} converter...")
+            extra_args = shlex.split(getattr(args, f"{name}_args"))
+            record['converters'][name] = run_converter(name, server, extra_args, args.keep)
+            print_result(name, record['converters'][name])
+    finally:
+        server.stop()
+
+    os.makedirs(os.path.dirname(args.results) or '.', exist_ok=True)
+    with open(args.results, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record) + '\n')
+    print(f"\n💾 Recorded as run {len(load_results(args.results)) - 1} in {args.results}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark the single-pass lxml rewriter against the old BeautifulSoup code
+Times per-page parse + rewrite for scraped documents (scrape_page) and for
+content fragments (process_content) over the saved site pages
+"""
+
+import glob
+import re
+import statistics
+import sys
+import time
+from bs4 import BeautifulSoup
+from html_rewriter import HtmlRewriter
+
+WP_URL = "https://iowaallpro2.republicleadhunter.com"
+
+def image_src(src):
+    return f"/images/wp_{src.split('/')[-1]}"
+
+def link_href(href):
+    return href.replace(WP_URL, '') if WP_URL in href else href
+
+def legacy_process_content(soup):
+    """The html.parser-based rewrite used before, minus the downloads"""
+    for img in soup.find_all('img'):
+        src = img.get('src')
+        if src:
+            img['src'] = image_src(src)
+    for link in soup.find_all('a'):
+        href = link.get('href')
+        if href and WP_URL in href:
+            link['href'] = link_href(href)
+    return soup
+
+def legacy_scrape(content):
+    soup = BeautifulSoup(content, 'html.parser')
+    title_tag = soup.find('title')
+    title = title_tag.get_text().strip() if title_tag else "Untitled"
+    for element in soup.find_all(['script', 'style', 'nav', 'footer', 'header']):
+        element.decompose()
+    main_content = soup.find('main') or soup.find('article') or soup.find('div', class_=re.compile(r'content|main|post'))
+    if not main_content:
+        main_content = soup.find('body')
+        if main_content:
+            for element in main_content.find_all(['header', 'nav', 'footer']):
+                element.decompose()
+    if main_content:
+        return title, str(legacy_process_content(main_content))
+    return title, str(soup)
+
+def legacy_fragment(content):
+    return str(legacy_process_content(BeautifulSoup(content, 'html.parser')))
+
+def time_per_page(func, documents, repeat):
+    """Return the median seconds per call for each document"""
+    timings = []
+    for document in documents:
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func(document)
+            samples.append(time.perf_counter() - start)
+        timings.append(statistics.median(samples))
+    return timings
+
+def report(label, legacy, single_pass):
+    legacy_ms = statistics.mean(legacy) * 1000
+    new_ms = statistics.mean(single_pass) * 1000
+    print(f"{label:<12} legacy {legacy_ms:8.2f} ms/page   lxml {new_ms:8.2f} ms/page   {legacy_ms / new_ms:5.1f}x faster")
+
+def main():
+    paths = sys.argv[1:] or sorted(glob.glob("src/pages/site/**/*.html", recursive=True))
+    if not paths:
+        print("Usage: python3 bench-html-rewriter.py [page.html ...]")
+        sys.exit(1)
+
+    documents = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            documents.append(f.read())
+    print(f"📊 Benchmarking {len(documents)} pages ({sum(map(len, documents)) // 1024} KB)")
+
+    rewriter = HtmlRewriter(image_src=image_src, link_href=link_href)
+    # Fragments are what process_content sees: the extracted main content
+    fragments = [rewriter.rewrite_document(document)['content'] for document in documents]
+
+    repeat = 5
+    report("documents", time_per_page(legacy_scrape, documents, repeat),
+           time_per_page(rewriter.rewrite_document, documents, repeat))
+    report("fragments", time_per_page(legacy_fragment, fragments, repeat),
+           time_per_page(rewriter.rewrite_fragment, fragments, repeat))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Local stand-in WordPress site for the end-to-end benchmarks
+Serves the REST API, sitemaps, rendered pages and uploads from the saved
+snapshot (public/wp-json for items, src/pages/site for rendered HTML and
+public/wp-content/uploads for images), scaled to any number of synthetic
+posts, and counts the requests and bytes it serves
+"""
+
+import glob
+import io
+import json
+import math
+import os
+import re
+import threading
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from PIL import Image
+
+SITEMAP_PAGE_SIZE = 2000
+TERM_NAMES = {
+    'categories': ['Heating', 'Cooling', 'Air Quality', 'Water Heaters', 'Maintenance', 'Commercial', 'News', 'Offers'],
+    'tags': [f"Tip {n}" for n in range(1, 21)],
+    'users': ['Admin', 'Service Team', 'Office'],
+}
+BODY = re.compile(r'<body\b[^>]*>(.*)</body>', re.S | re.I)
+TITLE = re.compile(r'<title>(.*?)</title>', re.S | re.I)
+UPLOAD_URL = re.compile(r'''/wp-content/uploads/[^"'\s?#)]+\.(?:png|jpe?g|gif|webp|svg)''', re.I)
+
+def placeholder_image():
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 48), (200, 200, 200)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+class StandInSite:
+    """The content the stand-in server answers with, built once up front"""
+
+    def __init__(self, posts=500, seed_dir="public/wp-json", rendered_dir="src/pages/site",
+                 uploads_dir="public/wp-content/uploads"):
+        self.post_count = posts
+        self.seed_dir = seed_dir
+        self.rendered_dir = rendered_dir
+        self.uploads_dir = uploads_dir
+        self.base_url = None
+        self.origin = None
+        self.placeholder = placeholder_image()
+
+    def load(self, base_url):
+        """Build every item for a server listening at `base_url`"""
+        self.base_url = base_url.rstrip('/')
+        seeds = []
+        for path in sorted(glob.glob(os.path.join(self.seed_dir, 'wp', 'v2', 'pages', '*'))):
+            with open(path, 'r', encoding='utf-8') as f:
+                seeds.append(json.load(f))
+        if seeds:
+            parts = urlparse(seeds[0]['link'])
+            self.origin = f"{parts.scheme}://{parts.netloc}"
+
+        # Rendered documents by URL path, pointed at this server
+        self.documents = {}
+        for path in sorted(glob.glob(os.path.join(self.rendered_dir, '**', 'index.html'), recursive=True)):
+            route = '/' + os.path.relpath(os.path.dirname(path), self.rendered_dir).replace(os.sep, '/') + '/'
+            with open(path, 'r', encoding='utf-8') as f:
+                self.documents[route.replace('/./', '/')] = self.localize(f.read())
+        templates = list(self.documents.values())
+        if not templates:
+            raise ValueError(f"No rendered pages found under {self.rendered_dir}")
+
+        images = sorted({url for document in templates for url in UPLOAD_URL.findall(document)})
+        self.media = {
+            media_id: {'id': media_id, 'source_url': f"{self.base_url}{url}", 'alt_text': '',
+                       'media_details': {'width': 1200, 'height': 800, 'sizes': {}}}
+            for media_id, url in enumerate(images, 1)
+        }
+        self.terms = {
+            endpoint: [{'id': term_id, 'name': name, 'slug': re.sub(r'\W+', '-', name.lower()),
+                        'description': '', 'link': f"{self.base_url}/{endpoint}/{term_id}/"}
+                       for term_id, name in enumerate(names, 1)]
+            for endpoint, names in TERM_NAMES.items()
+        }
+
+        self.pages = []
+        for seed in seeds:
+            route = urlparse(seed['link']).path
+            document = self.documents.get(route)
+            page = dict(seed, link=f"{self.base_url}{route}")
+            if document and not seed['content']['rendered']:
+                # Oxygen keeps its content out of the REST API, use the rendered page's
+                page['content'] = {'rendered': self.body(document), 'protected': False}
+            page.pop('_links', None)
+            self.pages.append(page)
+
+        self.posts = []
+        for n in range(1, self.post_count + 1):
+            template = templates[n % len(templates)]
+            slug = f"benchmark-post-{n}"
+            self.posts.append({
+                'id': 100000 + n,
+                'date': f"2025-{1 + n % 12:02d}-{1 + n % 28:02d}T08:00:00",
+                'modified': f"2025-{1 + n % 12:02d}-{1 + n % 28:02d}T09:00:00",
+                'modified_gmt': f"2025-{1 + n % 12:02d}-{1 + n % 28:02d}T14:00:00",
+                'slug': slug,
+                'status': 'publish',
+                'type': 'post',
+                'link': f"{self.base_url}/{slug}/",
+                'title': {'rendered': f"Benchmark post {n}"},
+                'content': {'rendered': self.body(template), 'protected': False},
+                'excerpt': {'rendered': f"<p>Synthetic post {n} for benchmarking.</p>"},
+                'author': 1 + n % len(TERM_NAMES['users']),
+                'categories': [1 + n % len(TERM_NAMES['categories'])],
+                'tags': [1 + n % len(TERM_NAMES['tags']), 1 + (n * 7) % len(TERM_NAMES['tags'])],
+                'featured_media': 1 + n % len(self.media) if self.media else 0,
+            })
+            self.documents[f"/{slug}/"] = TITLE.sub(f"<title>Benchmark post {n}</title>", template, count=1)
+        self.items = {item['id']: item for item in self.pages + self.posts}
+
+    def localize(self, text):
+        return text.replace(self.origin, self.base_url) if self.origin else text
+
+    def body(self, document):
+        match = BODY.search(document)
+        return match.group(1).strip() if match else document
+
+    def embedded(self, item):
+        """What ?_embed adds to an item"""
+        embedded = {
+            'author': [self.terms['users'][(item.get('author') or 1) - 1]],
+            'wp:term': [[term for term in self.terms['categories'] if term['id'] in item.get('categories', [])],
+                        [term for term in self.terms['tags'] if term['id'] in item.get('tags', [])]],
+        }
+        if item.get('featured_media') in self.media:
+            embedded['wp:featuredmedia'] = [self.media[item['featured_media']]]
+        return embedded
+
+    def render_item(self, item, query):
+        if '_fields' in query:
+            fields = query['_fields'][0].split(',')
+            return {field: item[field] for field in fields if field in item}
+        item = dict(item, _links={'self': [{'href': f"{self.base_url}/wp-json/wp/v2/{item['type']}s/{item['id']}"}]})
+        if '_embed' in query:
+            item['_embedded'] = self.embedded(item)
+        return item
+
+    def collection(self, items, query):
+        """One page of a collection as (items, total, total pages), filtered like the API"""
+        include = query.get('include', [''])[0]
+        if include:
+            wanted = {int(item_id) for item_id in include.split(',') if item_id}
+            items = [item for item in items if item['id'] in wanted]
+        modified_after = query.get('modified_after', [''])[0]
+        if modified_after:
+            items = [item for item in items if item.get('modified', '') > modified_after]
+        items = sorted(items, key=lambda item: (item.get('date', ''), item['id']), reverse=True)
+        per_page = int(query.get('per_page', ['10'])[0])
+        page = int(query.get('page', ['1'])[0])
+        selected = items[(page - 1) * per_page:page * per_page]
+        return selected, len(items), max(1, math.ceil(len(items) / per_page))
+
+    def sitemap(self, path):
+        """XML for a WordPress core sitemap path, or None"""
+        post_pages = max(1, math.ceil(len(self.posts) / SITEMAP_PAGE_SIZE))
+        if path == '/wp-sitemap.xml':
+            names = ['posts-page-1'] + [f"posts-post-{n}" for n in range(1, post_pages + 1)] + ['taxonomies-category-1']
+            entries = ''.join(f"<sitemap><loc>{self.base_url}/wp-sitemap-{name}.xml</loc></sitemap>" for name in names)
+            return f'<?xml version="1.0" encoding="UTF-8"?><sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</sitemapindex>'
+        match = re.fullmatch(r'/wp-sitemap-posts-(page|post)-(\d+)\.xml', path)
+        if not match:
+            return None
+        if match.group(1) == 'page':
+            items = self.pages
+        else:
+            start = (int(match.group(2)) - 1) * SITEMAP_PAGE_SIZE
+            items = self.posts[start:start + SITEMAP_PAGE_SIZE]
+        entries = ''.join(f"<url><loc>{item['link']}</loc><lastmod>{item['modified_gmt']}</lastmod></url>" for item in items)
+        return f'<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</urlset>'
+
+    def upload(self, path):
+        """Bytes of an uploaded image, a placeholder for ones not saved locally"""
+        local = os.path.join(self.uploads_dir, path[len('/wp-content/uploads/'):])
+        if os.path.isfile(local):
+            with open(local, 'rb') as f:
+                return f.read()
+        return self.placeholder
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, status, body, content_type, headers=None):
+        data = body.encode('utf-8') if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+        self.server.count(len(data))
+
+    def send_json(self, data, headers=None):
+        self.send_body(200, json.dumps(data), 'application/json; charset=UTF-8', headers)
+
+    def do_GET(self):
+        site = self.server.site
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        path = url.path
+
+        api = re.fullmatch(r'/wp-json/wp/v2/([\w-]+)(?:/(\d+))?/?', path)
+        if api:
+            endpoint, item_id = api.group(1), api.group(2)
+            if endpoint in ('posts', 'pages'):
+                items = site.posts if endpoint == 'posts' else site.pages
+                if item_id:
+                    item = site.items.get(int(item_id))
+                    if item is None:
+                        return self.send_body(404, json.dumps({'code': 'rest_post_invalid_id'}), 'application/json')
+                    return self.send_json(site.render_item(item, query))
+                selected, total, pages = site.collection(items, query)
+                if not selected and int(query.get('page', ['1'])[0]) > 1:
+                    return self.send_body(400, json.dumps({'code': 'rest_post_invalid_page_number'}),
+                                          'application/json')
+                return self.send_json([site.render_item(item, query) for item in selected],
+                                      {'X-WP-Total': str(total), 'X-WP-TotalPages': str(pages)})
+            if endpoint == 'media':
+                if item_id:
+                    media = site.media.get(int(item_id))
+                    return self.send_json(media) if media else self.send_body(404, '{}', 'application/json')
+                selected, total, pages = site.collection(list(site.media.values()), query)
+                return self.send_json(selected, {'X-WP-Total': str(total), 'X-WP-TotalPages': str(pages)})
+            if endpoint in site.terms:
+                selected, total, pages = site.collection(site.terms[endpoint], query)
+                if '_fields' in query:
+                    fields = query['_fields'][0].split(',')
+                    selected = [{field: term[field] for field in fields if field in term} for term in selected]
+                return self.send_json(selected, {'X-WP-Total': str(total), 'X-WP-TotalPages': str(pages)})
+            return self.send_json([], {'X-WP-Total': '0', 'X-WP-TotalPages': '0'})
+
+        if path.startswith('/wp-content/uploads/'):
+            return self.send_body(200, site.upload(path), 'image/png')
+
+        sitemap = site.sitemap(path) if path.endswith('.xml') else None
+        if sitemap:
+            return self.send_body(200, sitemap, 'application/xml; charset=UTF-8')
+
+        document = site.documents.get(path if path.endswith('/') else path + '/')
+        if document is None:
+            return self.send_body(404, 'Not found', 'text/plain')
+        etag = f'"{zlib.crc32(document.encode("utf-8")):08x}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            self.server.count(0)
+            return
+        self.send_body(200, document, 'text/html; charset=UTF-8', {'ETag': etag})
+
+class StandInServer(ThreadingHTTPServer):
+    """Serves a StandInSite on localhost from a background thread"""
+
+    daemon_threads = True
+
+    def __init__(self, site, port=0):
+        super().__init__(('127.0.0.1', port), StandInHandler)
+        self.site = site
+        self.site.load(self.base_url)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.bytes_sent = 0
+        self.thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def count(self, size):
+        with self.lock:
+            self.requests += 1
+            self.bytes_sent += size
+
+    def reset_counters(self):
+        with self.lock:
+            self.requests = 0
+            self.bytes_sent = 0
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
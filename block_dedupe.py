@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Cross-page HTML block deduplication for generated Astro pages
+Finds element subtrees that appear verbatim, byte for byte, in the
+set:html content of several pages, moves each into a shared component
+under src/components/shared and splices the pages' HTML around a
+reference to it. The rendered HTML is unchanged, byte for byte
+"""
+
+import glob
+import hashlib
+import json
+import os
+import re
+from collections import defaultdict
+from html.parser import HTMLParser
+
+DEFAULT_COMPONENTS_DIR = "src/components/shared"
+DEFAULT_MIN_BYTES = 1024
+DEFAULT_MIN_PAGES = 2
+VOID_TAGS = frozenset(['area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+                       'param', 'source', 'track', 'wbr'])
+CONFLICT_MARKER = re.compile(r'^(?:<<<<<<<|>>>>>>>) ', re.M)
+# <tag ... set:html={`...`} /> with the HTML inline as a template literal
+LITERAL_SITE = re.compile(r'<(?P<tag>[\w.]+)(?P<attrs>[^<>`]*?)\s+set:html=\{`(?P<body>(?:[^`\\]|\\.)*)`\}'
+                          r'(?P<rest>[^<>`]*?)\s*/>', re.S)
+# <tag ... set:html={name} /> with `const name = "...";` in the frontmatter
+CONST_SITE = re.compile(r'<(?P<tag>[\w.]+)(?P<attrs>[^<>`{]*?)\s+set:html=\{(?P<name>[A-Za-z_]\w*)\}'
+                        r'(?P<rest>[^<>`{]*?)\s*/>')
+COMPONENT_IMPORT = re.compile(r"^import (Shared\w+) from '[^']*components/shared/\1\.astro';\n", re.M)
+
+class ElementSpans(HTMLParser):
+    """Finds the exact source span of every properly closed element in an HTML string"""
+
+    def __init__(self, html):
+        super().__init__(convert_charrefs=False)
+        self.html = html
+        # HTMLParser counts lines by '\n' only, unlike str.splitlines()
+        self.line_offsets = [0] + [match.end() for match in re.finditer('\n', html)]
+        self.stack = []
+        # (start, end) of each element, inner elements before outer ones
+        self.spans = []
+        self.feed(html)
+        self.close()
+
+    def source_offset(self):
+        line, column = self.getpos()
+        return self.line_offsets[line - 1] + column
+
+    def handle_starttag(self, tag, attrs):
+        start = self.source_offset()
+        if tag in VOID_TAGS:
+            self.spans.append((start, start + len(self.get_starttag_text())))
+        else:
+            self.stack.append((tag, start))
+
+    def handle_startendtag(self, tag, attrs):
+        start = self.source_offset()
+        self.spans.append((start, start + len(self.get_starttag_text())))
+
+    def handle_endtag(self, tag):
+        if not any(open_tag == tag for open_tag, _ in self.stack):
+            return  # stray end tag
+        # Elements closed implicitly by this one have no clean span, skip them
+        while self.stack[-1][0] != tag:
+            self.stack.pop()
+        _, start = self.stack.pop()
+        end = self.html.index('>', self.source_offset()) + 1
+        self.spans.append((start, end))
+
+def block_key(block):
+    """Hash of a block's exact markup
+
+    Whitespace counts: the first copy's markup is rendered for every page,
+    so copies differing in spacing (inline text, <pre>) must not share it.
+    """
+    return hashlib.sha1(block.encode('utf-8')).hexdigest()
+
+def component_name(block, key):
+    """A readable, stable component name such as SharedFooter1a2b3c4d"""
+    match = re.match(r'<([\w-]+)[^>]*?(?:\sclass="([^"]*)")?', block)
+    words = [match.group(1)] if match else ['block']
+    if match and match.group(2):
+        words.append(match.group(2).split()[0])
+    pascal = ''.join(part.capitalize() for word in words for part in re.split(r'[^A-Za-z0-9]+', word) if part)
+    return f"Shared{pascal}{key[:8]}"
+
+def relative_import(page_path, component_path):
+    path = os.path.relpath(component_path, os.path.dirname(page_path)).replace(os.sep, '/')
+    return path if path.startswith('.') else f"./{path}"
+
+def unescape_template_literal(body):
+    return re.sub(r'\\(.)', r'\1', body, flags=re.S)
+
+def escape_template_literal(html):
+    return html.replace('\\', '\\\\').replace('`', '\\`').replace('${', '\\${')
+
+class Site:
+    """One set:html usage in a page: where it is and the HTML it renders"""
+
+    def __init__(self, match, html, const=None):
+        self.match = match
+        self.html = html
+        # (start, end) span of the `const name = "...";` declaration for const sites
+        self.const = const
+        self.blocks = []
+
+class BlockDeduplicator:
+    def __init__(self, components_dir=DEFAULT_COMPONENTS_DIR, min_bytes=DEFAULT_MIN_BYTES,
+                 min_pages=DEFAULT_MIN_PAGES):
+        self.components_dir = components_dir
+        self.min_bytes = min_bytes
+        self.min_pages = min_pages
+
+    def find_sites(self, content):
+        """Return the set:html sites of a page whose HTML we can read"""
+        sites = []
+        for match in LITERAL_SITE.finditer(content):
+            sites.append(Site(match, unescape_template_literal(match.group('body'))))
+        for match in CONST_SITE.finditer(content):
+            declaration = re.search(rf'const {match.group("name")} = ("(?:[^"\\]|\\.)*");', content)
+            if not declaration:
+                continue
+            try:
+                html = json.loads(declaration.group(1))
+            except ValueError:
+                continue
+            sites.append(Site(match, html, declaration.span()))
+        return sites
+
+    def candidates(self, pages):
+        """Map block key -> {page: [(site, start, end)]} for blocks big enough to share"""
+        found = defaultdict(lambda: defaultdict(list))
+        for path, (_, sites) in pages.items():
+            for site in sites:
+                for start, end in ElementSpans(site.html).spans:
+                    if end - start >= self.min_bytes:
+                        found[block_key(site.html[start:end])][path].append((site, start, end))
+        return found
+
+    def select(self, pages):
+        """Choose blocks to share, largest first, never one inside another already chosen
+
+        Returns {key: block HTML} and fills in each site's (start, end, key) blocks.
+        """
+        found = self.candidates(pages)
+        order = sorted(found, key=lambda key: -max(end - start for occurrences in found[key].values()
+                                                   for _, start, end in occurrences))
+        chosen = {}
+        for key in order:
+            free = {
+                path: [(site, start, end) for site, start, end in occurrences
+                       if not any(s <= start < e or start <= s < end for s, e, _ in site.blocks)]
+                for path, occurrences in found[key].items()
+            }
+            free = {path: occurrences for path, occurrences in free.items() if occurrences}
+            if len(free) < self.min_pages:
+                continue
+            for occurrences in free.values():
+                for site, start, end in occurrences:
+                    site.blocks.append((start, end, key))
+                    chosen.setdefault(key, site.html[start:end])
+        return chosen
+
+    def component_source(self, block, pages):
+        return (f"---\n// Shared HTML block used by {pages} pages, generated by dedupe-blocks.py\n---\n"
+                f"<Fragment set:html={{{json.dumps(block, ensure_ascii=False)}}} />\n")
+
+    def rewrite_page(self, path, content, sites, names):
+        """Splice each site's HTML around references to the shared components"""
+        used = set()
+        edits = []
+        for site in sites:
+            if not site.blocks:
+                continue
+            parts = []
+            position = 0
+            for start, end, key in sorted(site.blocks):
+                parts.append(('html', site.html[position:start]))
+                parts.append(('component', names[key]))
+                used.add(names[key])
+                position = end
+            parts.append(('html', site.html[position:]))
+
+            match = site.match
+            children = []
+            for kind, value in parts:
+                if kind == 'component':
+                    children.append(f"<{value} />")
+                elif value and site.const is None:
+                    children.append(f"<Fragment set:html={{`{escape_template_literal(value)}`}} />")
+                elif value:
+                    children.append(f"<Fragment set:html={{{json.dumps(value, ensure_ascii=False)}}} />")
+            element = f"<{match.group('tag')}{match.group('attrs')}{match.group('rest')}>{''.join(children)}</{match.group('tag')}>"
+            edits.append((match.start(), match.end(), element))
+            if site.const:
+                # The HTML now lives inline in the template
+                edits.append((site.const[0], site.const[1] + (content[site.const[1]:site.const[1] + 1] == '\n'), ''))
+
+        for start, end, replacement in sorted(edits, reverse=True):
+            content = content[:start] + replacement + content[end:]
+
+        imports = ''.join(
+            f"import {name} from '{relative_import(path, os.path.join(self.components_dir, name + '.astro'))}';\n"
+            for name in sorted(used) if f"import {name} from" not in content
+        )
+        if imports:
+            if content.startswith('---\n'):
+                content = '---\n' + imports + content[4:]
+            else:
+                content = f"---\n{imports}---\n{content}"
+        return content
+
+    def run(self, pages_dir, writer, dry_run=False):
+        """Deduplicate every page under `pages_dir`, returning (pages changed, components)"""
+        pages = {}
+        users = defaultdict(int)
+        for path in sorted(glob.glob(os.path.join(pages_dir, '**', '*.astro'), recursive=True)):
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            if CONFLICT_MARKER.search(content):
+                print(f"  ❌ {path}: unresolved merge conflict, left untouched")
+                for name in set(COMPONENT_IMPORT.findall(content)):
+                    users[name] += 1
+                continue
+            pages[path] = (content, self.find_sites(content))
+
+        chosen = self.select(pages)
+        names = {key: component_name(block, key) for key, block in chosen.items()}
+        changed = 0
+        for path, (content, sites) in pages.items():
+            updated = self.rewrite_page(path, content, sites, names)
+            for name in set(COMPONENT_IMPORT.findall(updated)):
+                users[name] += 1
+            if updated != content:
+                changed += 1
+                delta = len(updated) - len(content)
+                print(f"  ✅ {'Would dedupe' if dry_run else 'Deduped'} {path} ({delta:+,} bytes)")
+                if not dry_run:
+                    writer.write(path, updated)
+
+        for key, block in chosen.items():
+            print(f"  🧩 {names[key]}: {len(block):,} bytes shared by {users[names[key]]} pages")
+            if not dry_run:
+                writer.write(os.path.join(self.components_dir, names[key] + '.astro'),
+                             self.component_source(block, users[names[key]]))
+
+        # Components no page imports any more
+        for path in glob.glob(os.path.join(self.components_dir, 'Shared*.astro')):
+            name = os.path.splitext(os.path.basename(path))[0]
+            if not users.get(name):
+                print(f"  🗑️  {'Would remove' if dry_run else 'Removed'} unused {path}")
+                if not dry_run:
+                    os.remove(path)
+        return changed, len(chosen)
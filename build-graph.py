@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Query the converters' build dependency graph and collect unused assets
+  dependents <target>  sources and files that depend on an asset, URL or file
+  gc [--delete]        list (or remove) images nothing references any more
+  stats                size of the graph
+"""
+
+import argparse
+import os
+from build_graph import BuildGraph, find_orphans
+
+def show_dependents(graph, targets):
+    for target in targets:
+        sources = graph.dependents(target)
+        if not sources:
+            print(f"Nothing depends on {target}")
+            continue
+        print(f"{len(sources)} sources depend on {target}:")
+        for source in sources:
+            print(f"  {source}")
+            for path in graph.sources[source]['outputs']:
+                print(f"    -> {path}")
+
+def collect_garbage(graph, asset_dirs, scan_roots, delete):
+    orphans = find_orphans(graph, asset_dirs, scan_roots)
+    total = 0
+    for path in orphans:
+        size = os.path.getsize(path)
+        total += size
+        if delete:
+            os.remove(path)
+        print(f"  {'🗑️  Removed' if delete else 'Unreferenced'}: {path} ({size // 1024} KB)")
+    verb = "Removed" if delete else "Found"
+    print(f"\n✅ {verb} {len(orphans)} unreferenced assets ({total / 1024 / 1024:.1f} MB)")
+    if orphans and not delete:
+        print("Run again with --delete to remove them")
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the build dependency graph")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    dependents = subparsers.add_parser('dependents', help="Show what depends on an asset, source URL or file")
+    dependents.add_argument('targets', nargs='+')
+
+    gc = subparsers.add_parser('gc', help="Find images that nothing references")
+    gc.add_argument('--delete', action='store_true', help="Remove them instead of listing them")
+    gc.add_argument('--assets', nargs='+', default=["public/images", "public/wp-content/uploads"],
+                    help="Asset directories to collect (default: public/images public/wp-content/uploads)")
+    gc.add_argument('--scan', nargs='+', default=["src", "public"],
+                    help="Directories whose files may reference assets (default: src public)")
+
+    subparsers.add_parser('stats', help="Summarise the graph")
+    args = parser.parse_args()
+
+    graph = BuildGraph()
+    if args.command == 'dependents':
+        show_dependents(graph, args.targets)
+    elif args.command == 'gc':
+        collect_garbage(graph, args.assets, args.scan, args.delete)
+    else:
+        outputs = sum(len(node['outputs']) for node in graph.sources.values())
+        print(f"{len(graph.sources)} sources, {outputs} output files, {len(graph.referenced_assets())} assets")
+
+if __name__ == "__main__":
+    main()
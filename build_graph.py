@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Build dependency graph for the converters
+Records which source URL produced which content and page files and which
+local assets (downloaded images) those files reference, so a change can
+be traced to exactly what must be rebuilt and assets nothing references
+any more can be garbage collected
+"""
+
+import json
+import os
+import re
+import threading
+from collections import defaultdict
+from urllib.parse import unquote
+
+DEFAULT_GRAPH_PATH = ".cache/build-graph.json"
+ASSET_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp', '.avif', '.svg')
+# Files whose text can reference an asset by name
+REFERENCE_EXTENSIONS = ('.astro', '.md', '.mdx', '.html', '.css', '.js', '.ts', '.json')
+NAME_TOKEN = re.compile(r'[\w@%+.-]+')
+
+class BuildGraph:
+    def __init__(self, path=DEFAULT_GRAPH_PATH):
+        self.path = path
+        # source URL -> {'outputs': [paths], 'assets': [paths], 'asset_urls': [urls]}
+        self.sources = {}
+        # node (output path, asset path or asset URL) -> source URLs depending on it
+        self.dependents_index = defaultdict(set)
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Load the graph from disk if a previous run left one"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.sources = json.load(f).get('sources', {})
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Ignoring unreadable build graph: {e}")
+            return
+        for source, node in self.sources.items():
+            self.index(source, node)
+
+    def save(self):
+        """Write the graph atomically"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with self.lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'sources': self.sources}, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+    def index(self, source, node):
+        for key in node['outputs'] + node['assets'] + node['asset_urls']:
+            self.dependents_index[key].add(source)
+
+    def unindex(self, source, node):
+        for key in node['outputs'] + node['assets'] + node['asset_urls']:
+            dependents = self.dependents_index.get(key)
+            if dependents:
+                dependents.discard(source)
+                if not dependents:
+                    del self.dependents_index[key]
+
+    def record(self, source, outputs, assets=()):
+        """Record what `source` produced; `assets` are (asset_url, local_path) pairs"""
+        assets = sorted(set(assets))
+        node = {
+            'outputs': sorted(set(outputs)),
+            'assets': sorted({path for _, path in assets}),
+            'asset_urls': sorted({url for url, _ in assets}),
+        }
+        with self.lock:
+            previous = self.sources.get(source)
+            if previous:
+                self.unindex(source, previous)
+            self.sources[source] = node
+            self.index(source, node)
+
+    def remove(self, source):
+        with self.lock:
+            node = self.sources.pop(source, None)
+            if node:
+                self.unindex(source, node)
+        return node
+
+    def dependents(self, target):
+        """Return the source URLs that depend on `target`
+
+        `target` can be a source URL itself, an output file, a local asset
+        path or the URL an asset was downloaded from.
+        """
+        with self.lock:
+            found = set(self.dependents_index.get(target, ()))
+            normalized = os.path.normpath(target)
+            found.update(self.dependents_index.get(normalized, ()))
+            if target in self.sources:
+                found.add(target)
+        return sorted(found)
+
+    def outputs(self, source):
+        """Files `source` produced, empty when it isn't in the graph"""
+        with self.lock:
+            node = self.sources.get(source)
+            return list(node['outputs']) if node else []
+
+    def referenced_assets(self):
+        with self.lock:
+            return {path for node in self.sources.values() for path in node['assets']}
+
+def referenced_names(roots):
+    """Every file-name-like token in the text files under `roots`"""
+    names = set()
+    for root in roots:
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                if not filename.endswith(REFERENCE_EXTENSIONS):
+                    continue
+                try:
+                    with open(os.path.join(directory, filename), 'r', encoding='utf-8', errors='ignore') as f:
+                        text = f.read()
+                except OSError:
+                    continue
+                names.update(NAME_TOKEN.findall(text))
+                names.update(NAME_TOKEN.findall(unquote(text)))
+    return names
+
+def find_orphans(graph, asset_dirs, scan_roots, prefix=None):
+    """Return asset files under `asset_dirs` that neither the graph nor any text under `scan_roots` references
+
+    Matching on file names rather than resolved paths errs on the side of
+    keeping a file. Only files starting with `prefix` are considered when
+    given, and files without an extension only in converter image folders.
+    """
+    keep = {os.path.basename(path) for path in graph.referenced_assets()}
+    names = referenced_names(scan_roots)
+
+    orphans = []
+    for asset_dir in asset_dirs:
+        for directory, _, filenames in os.walk(asset_dir):
+            for filename in filenames:
+                if prefix and not filename.startswith(prefix):
+                    continue
+                if not filename.lower().endswith(ASSET_EXTENSIONS) and not filename.startswith('wp_'):
+                    continue
+                base = filename
+                if os.path.basename(directory) == 'variants':
+                    # Variants (wp_x-png-640.webp) live as long as their source image
+                    base = re.sub(r'-\d+\.\w+$', '', filename)
+                if base in keep or filename in names or base in names:
+                    continue
+                orphans.append(os.path.join(directory, filename))
+    return sorted(orphans)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Conversion manifest for incremental WordPress to Astro runs
+Records each converted item's id, modification timestamps and output
+files so later runs only reconvert what changed and can clean up
+items that were deleted or unpublished
+"""
+
+import json
+import os
+
+DEFAULT_MANIFEST_PATH = ".cache/conversion-manifest.json"
+
+class ConversionManifest:
+    def __init__(self, path=DEFAULT_MANIFEST_PATH):
+        self.path = path
+        # The site or export the records came from, see bind()
+        self.source = None
+        self.items = {'posts': {}, 'pages': {}}
+        self.load()
+
+    def load(self):
+        """Load the manifest from disk if a previous run left one"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Ignoring unreadable manifest, doing a full run: {e}")
+            return
+        self.source = data.get('source')
+        for kind in self.items:
+            self.items[kind] = data.get(kind, {})
+
+    def bind(self, source):
+        """Tie the manifest to `source`, forgetting records made from any other
+
+        Records from another site or export say nothing about what this one
+        changed or deleted, so they are never used to skip or remove items.
+        """
+        if self.source != source and any(self.items.values()):
+            print(f"⚠️  Manifest was made from {self.source or 'an unknown source'}, not {source}; "
+                  f"ignoring its records")
+            self.items = {kind: {} for kind in self.items}
+        self.source = source
+
+    def save(self):
+        """Write the manifest atomically"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'source': self.source, **self.items}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def last_modified(self, kind):
+        """Return the newest `modified` timestamp recorded for `kind`, or None"""
+        stamps = [record['modified'] for record in self.items[kind].values() if record.get('modified')]
+        return max(stamps) if stamps else None
+
+    def is_current(self, kind, item):
+        """True when `item` was already converted at its current revision"""
+        record = self.items[kind].get(str(item.get('id')))
+        if not record:
+            return False
+        if not all(os.path.exists(path) for path in record['outputs']):
+            return False
+        return record['modified_gmt'] == item.get('modified_gmt')
+
+    def record(self, kind, item, outputs):
+        """Remember that `item` produced `outputs`"""
+        self.items[kind][str(item.get('id'))] = {
+            'modified': item.get('modified', ''),
+            'modified_gmt': item.get('modified_gmt', ''),
+            'outputs': list(outputs),
+        }
+
+    def remove_missing(self, kind, live_ids):
+        """Drop records not in `live_ids`, deleting their outputs, and return them"""
+        live_ids = {str(item_id) for item_id in live_ids}
+        removed = {item_id: record for item_id, record in self.items[kind].items() if item_id not in live_ids}
+
+        for item_id, record in removed.items():
+            for path in record['outputs']:
+                if os.path.exists(path):
+                    os.remove(path)
+            del self.items[kind][item_id]
+
+        return removed
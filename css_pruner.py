@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Unused-CSS pruning for the generated pages
+Indexes the classes, ids and tags the pages (and the layouts and
+components they import) actually use, then drops the stylesheet rules
+that can't match any of them. Matching errs on the side of keeping a
+rule: only data-* attribute selectors are checked, pseudo-classes and
+escaped names never cause a rule to be dropped, and class names that
+scripts add at runtime are picked up from their string literals
+"""
+
+import glob
+import json
+import os
+import re
+from urllib.parse import urljoin
+
+DEFAULT_MANIFEST_PATH = "src/styles/pruned-styles.json"
+DEFAULT_OUTPUT_DIR = "public/pruned"
+DEFAULT_CRITICAL_BYTES = 8 * 1024
+# At-rules whose block holds ordinary rules that can be pruned one by one
+GROUP_AT_RULES = frozenset(['media', 'supports', 'layer', 'container', 'document'])
+# Always present in a rendered page
+DOCUMENT_TAGS = frozenset(['html', 'head', 'body'])
+
+COMMENT = re.compile(r'("(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\')|/\*.*?\*/', re.S)
+CSS_URL = re.compile(r'''url\(\s*(["']?)([^"')]+)\1\s*\)|(@import\s+)(["'])([^"']+)\4''')
+# class="..." in markup, in JSON-escaped strings (class=\"...\") and JSX-style className
+CLASS_ATTR = re.compile(r'\bclass(?:Name)?\s*=\s*(\\?["\'])(.*?)\1', re.S)
+ID_ATTR = re.compile(r'\bid\s*=\s*(\\?["\'])(.*?)\1', re.S)
+ATTRIBUTE = re.compile(r'[\s"\'\\]([a-zA-Z_:][\w:.-]*)\s*=\s*(\\?["\'])(.*?)\2', re.S)
+TAG = re.compile(r'<([a-zA-Z][\w-]*)')
+SCRIPT = re.compile(r'<script\b[^>]*>(.*?)</script>', re.S | re.I)
+STRING_LITERAL = re.compile(r'''(["'])((?:(?!\1)[^\\\n]|\\.){1,200})\1''')
+NAME = re.compile(r'-?[_a-zA-Z][\w-]*')
+SCRIPT_WORD = re.compile(r'[\w.-]+')
+ASTRO_IMPORT = re.compile(r'''^import\s+\w+\s+from\s+['"](\.[^'"]+\.astro)['"]''', re.M)
+
+SELECTOR_ATTRIBUTE = re.compile(r'\[\s*([\w:-]+)\s*(?:([~|^$*]?=)\s*(["\']?)(.*?)\3\s*(?:[is]\s*)?)?\]')
+SELECTOR_FUNCTION = re.compile(r'::?[\w-]+\((?:[^()]|\([^()]*\))*\)')
+SELECTOR_PSEUDO = re.compile(r'::?[\w-]+(?:\((?:[^()]|\([^()]*\))*\))?')
+SELECTOR_CLASS = re.compile(r'\.(-?[_a-zA-Z][\w-]*)')
+SELECTOR_ID = re.compile(r'#(-?[_a-zA-Z][\w-]*)')
+SELECTOR_TAG = re.compile(r'(?:^|[\s>+~])([a-zA-Z][\w-]*)')
+
+class UsageIndex:
+    """Classes, ids and tag names that appear in some markup"""
+
+    def __init__(self, safelist=()):
+        self.classes = set()
+        self.ids = set()
+        self.tags = set(DOCUMENT_TAGS)
+        self.attributes = set()
+        # (attribute, value) pairs, for [name="value"] selectors
+        self.attribute_values = set()
+        # Every word and number in scripts, which may set data-* values (AOS sets data-aos-duration on <body>)
+        self.script_words = set()
+        # Regexes for names to keep whether or not they are seen
+        self.safelist = [re.compile(pattern) for pattern in safelist]
+
+    def add_markup(self, text):
+        for _, value in CLASS_ATTR.findall(text):
+            self.classes.update(value.split())
+        for _, value in ID_ATTR.findall(text):
+            self.ids.update(value.split())
+        self.tags.update(tag.lower() for tag in TAG.findall(text))
+        for name, _, value in ATTRIBUTE.findall(text):
+            self.attributes.add(name.lower())
+            self.attribute_values.add((name.lower(), value))
+        for script in SCRIPT.findall(text):
+            self.add_script(script)
+
+    def add_script(self, text):
+        """Every name-like word in a script's string literals, e.g. addClass("oxy-nav-menu-open")"""
+        for _, literal in STRING_LITERAL.findall(text):
+            names = NAME.findall(literal)
+            self.classes.update(names)
+            self.ids.update(names)
+            self.attributes.update(name.lower() for name in names)
+        self.script_words.update(SCRIPT_WORD.findall(text))
+
+    def update(self, other):
+        self.classes |= other.classes
+        self.ids |= other.ids
+        self.tags |= other.tags
+        self.attributes |= other.attributes
+        self.attribute_values |= other.attribute_values
+        self.script_words |= other.script_words
+
+    def safe(self, name):
+        return any(pattern.search(name) for pattern in self.safelist)
+
+    def may_match(self, selector):
+        """Whether `selector` could match an element built from this usage"""
+        if '\\' in selector:
+            return True  # escaped names, not worth decoding
+        # :not([href]) and friends can match without the names inside them
+        selector = SELECTOR_FUNCTION.sub('', selector)
+        for name, operator, _, value in SELECTOR_ATTRIBUTE.findall(selector):
+            name = name.lower()
+            # Scripts set aria-*, hidden and the like at runtime, data-* comes from the markup
+            if not name.startswith('data-'):
+                continue
+            if name not in self.attributes:
+                return False
+            if operator == '=' and (name, value) not in self.attribute_values and value not in self.script_words:
+                return False
+        selector = SELECTOR_PSEUDO.sub('', SELECTOR_ATTRIBUTE.sub('', selector))
+        return (all(name in self.classes or self.safe(name) for name in SELECTOR_CLASS.findall(selector))
+                and all(name in self.ids or self.safe(name) for name in SELECTOR_ID.findall(selector))
+                and all(tag.lower() in self.tags for tag in SELECTOR_TAG.findall(selector)))
+
+def split_top_level(text, separator=','):
+    """Split on `separator` outside parentheses, brackets and strings"""
+    parts, depth, quote, start = [], 0, None, 0
+    for i, char in enumerate(text):
+        if quote:
+            if char == quote and text[i - 1] != '\\':
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == separator and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+def skip_string(css, i):
+    """Index just past the string starting at css[i]"""
+    quote = css[i]
+    i += 1
+    while i < len(css) and css[i] != quote:
+        i += 2 if css[i] == '\\' else 1
+    return i + 1
+
+def matching_brace(css, i):
+    """Index of the '}' closing the '{' at css[i]"""
+    depth = 0
+    while i < len(css):
+        if css[i] in '"\'':
+            i = skip_string(css, i)
+            continue
+        if css[i] == '{':
+            depth += 1
+        elif css[i] == '}':
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return len(css)
+
+def parse_stylesheet(css, i=0):
+    """Parse CSS into nodes: ('statement', text), ('rule', prelude, body), ('group', prelude, nodes)
+
+    Returns (nodes, index of the closing brace or end of input).
+    """
+    nodes = []
+    start = i
+    while i < len(css):
+        char = css[i]
+        if char in '"\'':
+            i = skip_string(css, i)
+            continue
+        if char == ';':
+            if css[start:i].strip():
+                nodes.append(('statement', css[start:i].strip()))
+            start = i + 1
+        elif char == '{':
+            prelude = css[start:i].strip()
+            at_rule = re.match(r'@([\w-]+)', prelude)
+            if at_rule and at_rule.group(1).lower() in GROUP_AT_RULES:
+                children, i = parse_stylesheet(css, i + 1)
+                nodes.append(('group', prelude, children))
+            else:
+                end = matching_brace(css, i)
+                nodes.append(('rule', prelude, css[i + 1:end].strip()))
+                i = end
+            start = i + 1
+        elif char == '}':
+            return nodes, i
+        i += 1
+    return nodes, i
+
+def prune_nodes(nodes, usage):
+    """Serialize `nodes`, dropping rules and selectors `usage` can't match"""
+    output = []
+    for node in nodes:
+        if node[0] == 'statement':
+            output.append(f"{node[1]};")
+        elif node[0] == 'group':
+            children = prune_nodes(node[2], usage)
+            if children:
+                output.append(f"{node[1]}{{{children}}}")
+        else:
+            _, prelude, body = node
+            if prelude.startswith('@'):
+                # @font-face, @keyframes, @page and friends are kept whole
+                output.append(f"{prelude}{{{body}}}")
+                continue
+            selectors = [selector for selector in split_top_level(prelude) if usage.may_match(selector)]
+            if selectors and body:
+                output.append(f"{','.join(selectors)}{{{body}}}")
+    return ''.join(output)
+
+def absolute_urls(css, href):
+    """Make url() and @import references absolute so the CSS can move to another path"""
+    def replace(match):
+        if match.group(3):
+            return f'{match.group(3)}"{urljoin(href, match.group(5))}"'
+        url = match.group(2).strip()
+        if not url or re.match(r'(?:[a-z][\w+.-]*:|/|#)', url, re.I):
+            return match.group(0)
+        return f'url("{urljoin(href, url)}")'
+    return CSS_URL.sub(replace, css)
+
+def load_stylesheet(public_dir, href):
+    """Read a local stylesheet by its site path and parse it"""
+    with open(os.path.join(public_dir, href.lstrip('/')), 'r', encoding='utf-8') as f:
+        css = f.read()
+    css = COMMENT.sub(lambda match: match.group(1) or '', css)
+    nodes, _ = parse_stylesheet(absolute_urls(css, href))
+    return nodes
+
+def page_route(path, pages_dir):
+    """The URL path a page file renders, or None for dynamic routes"""
+    route = os.path.splitext(os.path.relpath(path, pages_dir))[0].replace(os.sep, '/')
+    if '[' in route:
+        return None
+    route = re.sub(r'(?:^|/)index$', '', route)
+    return f"/{route}" if route else '/'
+
+def route_filename(route):
+    return 'index.css' if route == '/' else route.strip('/').replace('/', '--') + '.css'
+
+def template_part(text):
+    """An Astro file without its frontmatter"""
+    match = re.match(r'---\n.*?\n---\n?', text, re.S)
+    return text[match.end():] if match else text
+
+class CssPruner:
+    def __init__(self, pages_dir="src/pages", public_dir="public", output_dir=DEFAULT_OUTPUT_DIR,
+                 manifest_path=DEFAULT_MANIFEST_PATH, safelist=(), scripts=("public/*.js",)):
+        self.pages_dir = pages_dir
+        self.public_dir = public_dir
+        self.output_dir = output_dir
+        self.manifest_path = manifest_path
+        self.safelist = safelist
+        self.scripts = scripts
+        self.texts = {}
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        # The original stylesheets, in cascade order
+        self.sources = self.manifest['sources']
+        self.stylesheets = {href: load_stylesheet(public_dir, href) for href in self.sources}
+
+    def read(self, path):
+        if path not in self.texts:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.texts[path] = f.read()
+        return self.texts[path]
+
+    def imported_files(self, path, seen=None):
+        """`path` and every .astro file it imports, transitively"""
+        seen = seen if seen is not None else set()
+        path = os.path.normpath(path)
+        if path in seen or not os.path.exists(path):
+            return seen
+        seen.add(path)
+        for relative in ASTRO_IMPORT.findall(self.read(path)):
+            self.imported_files(os.path.join(os.path.dirname(path), relative), seen)
+        return seen
+
+    def runtime_usage(self):
+        """Names scripts outside the pages may add at runtime"""
+        usage = UsageIndex(self.safelist)
+        for pattern in self.scripts:
+            for path in glob.glob(pattern):
+                usage.add_script(self.read(path))
+        return usage
+
+    def page_usage(self, path, runtime):
+        usage = UsageIndex(self.safelist)
+        usage.update(runtime)
+        for imported in self.imported_files(path):
+            usage.add_markup(self.read(imported))
+        return usage
+
+    def critical_usage(self, path, runtime, critical_bytes):
+        """What renders first: layout markup before its <slot /> and the start of the page"""
+        usage = UsageIndex(self.safelist)
+        usage.update(runtime)
+        page = os.path.normpath(path)
+        for imported in self.imported_files(path):
+            text = self.read(imported)
+            if imported == page:
+                usage.add_markup(template_part(text)[:critical_bytes])
+            elif '<slot' in text:
+                usage.add_markup(text[:text.index('<slot')])
+                # Layout scripts sit after the slot but run on every page
+                for script in SCRIPT.findall(text):
+                    usage.add_script(script)
+        return usage
+
+    def prune(self, usage):
+        """Return {href: pruned css} for the source stylesheets"""
+        return {href: prune_nodes(nodes, usage) for href, nodes in self.stylesheets.items()}
+
+    def run(self, writer, per_route=False, critical_bytes=None, dry_run=False):
+        """Write pruned stylesheets and the manifest the layout reads, returning it"""
+        pages = [path for path in sorted(glob.glob(os.path.join(self.pages_dir, '**', '*.astro'), recursive=True))
+                 if page_route(path, self.pages_dir)]
+        runtime = self.runtime_usage()
+        original = sum(os.path.getsize(os.path.join(self.public_dir, href.lstrip('/'))) for href in self.sources)
+
+        site_usage = UsageIndex(self.safelist)
+        site_usage.update(runtime)
+        usages = {}
+        for path in pages:
+            usages[path] = self.page_usage(path, runtime)
+            site_usage.update(usages[path])
+
+        manifest = {'sources': self.sources, 'global': {'styles': [], 'critical': ''}, 'routes': {}}
+        pruned = self.prune(site_usage)
+        for href, css in pruned.items():
+            target = os.path.join(self.output_dir, href.lstrip('/'))
+            manifest['global']['styles'].append('/' + os.path.relpath(target, self.public_dir).replace(os.sep, '/'))
+            if not dry_run:
+                writer.write(target, css)
+        total = sum(len(css) for css in pruned.values())
+        print(f"  ✅ Site-wide: {original / 1024:.0f} KB -> {total / 1024:.0f} KB")
+
+        written = set()
+        for path in pages:
+            route = page_route(path, self.pages_dir)
+            entry = {'styles': manifest['global']['styles'], 'critical': ''}
+            if per_route:
+                css = ''.join(self.prune(usages[path]).values())
+                target = os.path.join(self.output_dir, 'routes', route_filename(route))
+                entry['styles'] = ['/' + os.path.relpath(target, self.public_dir).replace(os.sep, '/')]
+                written.add(os.path.normpath(target))
+                if not dry_run:
+                    writer.write(target, css)
+                print(f"  ✅ {route}: {len(css) / 1024:.0f} KB")
+            if critical_bytes:
+                entry['critical'] = ''.join(self.prune(self.critical_usage(path, runtime, critical_bytes)).values())
+            if per_route or critical_bytes:
+                manifest['routes'][route] = entry
+
+        if not dry_run:
+            # Route stylesheets of pages that no longer exist
+            for path in glob.glob(os.path.join(self.output_dir, 'routes', '*.css')):
+                if os.path.normpath(path) not in written:
+                    os.remove(path)
+            writer.write(self.manifest_path, json.dumps(manifest, indent=2) + '\n')
+        return manifest
+
+    def reset(self, writer):
+        """Point the layout back at the original stylesheets"""
+        writer.write(self.manifest_path, json.dumps(
+            {'sources': self.sources, 'global': {'styles': self.sources, 'critical': ''}, 'routes': {}},
+            indent=2) + '\n')
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Move HTML blocks repeated across pages into shared Astro components
+Large element subtrees found in the set:html content of several pages
+(navbars, footers, icon sprites) are written once to src/components/shared
+and the pages import them instead of carrying their own copy
+"""
+
+import argparse
+from block_dedupe import (DEFAULT_COMPONENTS_DIR, DEFAULT_MIN_BYTES, DEFAULT_MIN_PAGES,
+                          BlockDeduplicator)
+from output_writer import OutputWriter
+
+def main():
+    parser = argparse.ArgumentParser(description="Share HTML blocks repeated across Astro pages")
+    parser.add_argument('pages_dir', nargs='?', default="src/pages", help="Pages directory (default: src/pages)")
+    parser.add_argument('--components-dir', default=DEFAULT_COMPONENTS_DIR,
+                        help=f"Where shared components go (default: {DEFAULT_COMPONENTS_DIR})")
+    parser.add_argument('--min-bytes', type=int, default=DEFAULT_MIN_BYTES,
+                        help=f"Smallest block worth sharing (default: {DEFAULT_MIN_BYTES})")
+    parser.add_argument('--min-pages', type=int, default=DEFAULT_MIN_PAGES,
+                        help=f"Pages a block must appear on (default: {DEFAULT_MIN_PAGES})")
+    parser.add_argument('--dry-run', action='store_true', help="Report what would change without writing")
+    args = parser.parse_args()
+
+    deduplicator = BlockDeduplicator(args.components_dir, args.min_bytes, args.min_pages)
+    writer = OutputWriter()
+    changed, components = deduplicator.run(args.pages_dir, writer, args.dry_run)
+    writer.flush()
+
+    print(f"\n✅ {'Would share' if args.dry_run else 'Shared'} {components} blocks across {changed} pages")
+    if not args.dry_run:
+        print(f"💾 Output: {writer.summary()}")
+
+if __name__ == "__main__":
+    main()
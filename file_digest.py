@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+"""
+Content hashing for files on disk
+Streams a file through SHA-256 in fixed-size chunks, so images of any
+size are hashed without being read into memory at once
+"""
+
+import hashlib
+
+CHUNK_SIZE = 64 * 1024
+
+def file_digest(path):
+    """Return the hex SHA-256 digest of the file at `path`"""
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Whitespace-aware HTML minifier for the converters
+Streams the markup through a tokenizer instead of regexes, so <pre>,
+<textarea>, <script> and <style> content is kept byte for byte and the
+single space between inline elements survives. Also drops comments and
+attributes that only restate the browser's defaults
+"""
+
+import re
+from html.parser import HTMLParser
+
+VOID_TAGS = frozenset(['area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+                       'param', 'source', 'track', 'wbr'])
+# Whitespace next to these renders as nothing in normal flow
+BLOCK_TAGS = frozenset([
+    'address', 'article', 'aside', 'blockquote', 'body', 'br', 'caption', 'dd', 'details', 'dialog', 'div',
+    'dl', 'dt', 'fieldset', 'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'head', 'header', 'hgroup', 'hr', 'html', 'li', 'main', 'nav', 'ol', 'optgroup', 'option', 'p', 'pre',
+    'section', 'summary', 'table', 'tbody', 'td', 'tfoot', 'th', 'thead', 'title', 'tr', 'ul',
+])
+# Never rendered, so whitespace around them is kept as if they weren't there
+INVISIBLE_TAGS = frozenset(['script', 'style', 'link', 'meta', 'template'])
+# Content kept exactly as written
+PREFORMATTED_TAGS = frozenset(['pre', 'textarea'])
+BOOLEAN_ATTRS = frozenset([
+    'allowfullscreen', 'async', 'autofocus', 'autoplay', 'checked', 'controls', 'default', 'defer',
+    'disabled', 'formnovalidate', 'hidden', 'ismap', 'itemscope', 'loop', 'multiple', 'muted', 'nomodule',
+    'novalidate', 'open', 'playsinline', 'readonly', 'required', 'reversed', 'selected',
+])
+# (tag, attribute) -> values equal to the default, None for any value
+REDUNDANT_ATTRS = {
+    ('script', 'type'): {'text/javascript', 'application/javascript', ''},
+    ('script', 'language'): None,
+    ('style', 'type'): {'text/css', ''},
+    ('link', 'type'): {'text/css'},
+}
+# Attributes whose empty value means the same as leaving them out
+EMPTY_REMOVABLE = frozenset(['class', 'id', 'style'])
+WHITESPACE = re.compile(r'[ \t\n\r\f]+')
+QUOTED_VALUE = re.compile(r'"[^"]*"|\'[^\']*\'')
+
+class HTMLMinifier(HTMLParser):
+    """Minifies HTML fed in chunks, collecting the result in `output`
+
+    Tag and attribute names keep their original case, which matters for
+    inline SVG (viewBox, linearGradient).
+    """
+
+    def __init__(self, remove_comments=True):
+        super().__init__(convert_charrefs=False)
+        self.remove_comments = remove_comments
+        self.output = []
+        # Whitespace seen since the last token, emitted as one space if it matters
+        self.pending_space = False
+        self.after_block = True
+        self.preformatted = 0
+        self.tag_case = {}
+
+    def emit_space(self, next_is_block):
+        if self.pending_space and not (self.after_block or next_is_block):
+            self.output.append(' ')
+        self.pending_space = False
+
+    def emit_text(self, text):
+        self.emit_space(False)
+        self.output.append(text)
+        self.after_block = False
+
+    def emit_tag(self, tag, markup):
+        if tag in INVISIBLE_TAGS:
+            # Whitespace on either side still separates the text around it
+            self.output.append(markup)
+            return
+        block = tag in BLOCK_TAGS
+        self.emit_space(block)
+        self.output.append(markup)
+        self.after_block = block
+
+    def original_names(self, tag):
+        """Tag name and attribute names as written in the current start tag"""
+        raw = self.get_starttag_text()
+        name = raw[1:1 + len(tag)]
+        self.tag_case.setdefault(tag, name)
+        attributes = {}
+        # Blank out quoted values so words inside them aren't taken for names
+        unquoted = QUOTED_VALUE.sub('""', raw[1 + len(tag):])
+        for match in re.finditer(r'[\s"\'/]([^\s"\'/=<>]+)', unquoted):
+            attributes.setdefault(match.group(1).lower(), match.group(1))
+        return name, attributes
+
+    def start_tag_markup(self, tag, attrs, self_closing):
+        name, names = self.original_names(tag)
+        parts = [name]
+        for attr, value in attrs:
+            redundant = REDUNDANT_ATTRS.get((tag, attr), ())
+            if redundant is None or (value is not None and value.strip().lower() in redundant):
+                continue
+            if attr == 'class' and value:
+                value = ' '.join(value.split())
+            if attr in EMPTY_REMOVABLE and not (value or '').strip():
+                continue
+            attr = names.get(attr, attr)
+            if value is None or (attr.lower() in BOOLEAN_ATTRS and value.lower() in ('', attr.lower())):
+                parts.append(attr)
+            else:
+                parts.append(f'{attr}="{value.replace("&", "&amp;").replace(chr(34), "&quot;")}"')
+        ending = '/>' if self_closing and tag not in VOID_TAGS else '>'
+        return f"<{' '.join(parts)}{ending}"
+
+    def handle_starttag(self, tag, attrs):
+        self.emit_tag(tag, self.start_tag_markup(tag, attrs, False))
+        if tag in PREFORMATTED_TAGS:
+            self.preformatted += 1
+
+    def handle_startendtag(self, tag, attrs):
+        self.emit_tag(tag, self.start_tag_markup(tag, attrs, True))
+
+    def handle_endtag(self, tag):
+        if tag in PREFORMATTED_TAGS and self.preformatted:
+            self.preformatted -= 1
+        self.emit_tag(tag, f"</{self.tag_case.get(tag, tag)}>")
+
+    def handle_data(self, data):
+        if self.preformatted or self.cdata_elem:
+            # <pre>/<textarea> text and raw <script>/<style> bodies
+            self.output.append(data)
+            return
+        text = WHITESPACE.sub(' ', data)
+        core = text.strip(' ')
+        if not core:
+            self.pending_space = self.pending_space or bool(text)
+            return
+        if text.startswith(' '):
+            self.pending_space = True
+        self.emit_text(core)
+        self.pending_space = text.endswith(' ')
+
+    def handle_entityref(self, name):
+        self.emit_text(f"&{name};")
+
+    def handle_charref(self, name):
+        self.emit_text(f"&#{name};")
+
+    def handle_comment(self, data):
+        # Conditional comments still mean something to old IE
+        if not self.remove_comments or data.startswith('[if') or data.startswith('<![endif'):
+            self.output.append(f"<!--{data}-->")
+
+    def handle_decl(self, decl):
+        self.output.append(f"<!{decl}>")
+
+    def unknown_decl(self, data):
+        self.output.append(f"<![{data}]>")
+
+    def handle_pi(self, data):
+        self.output.append(f"<?{data}>")
+
+    def take(self):
+        """Return the minified HTML produced so far"""
+        output, self.output = ''.join(self.output), []
+        return output
+
+def minify_html(html, remove_comments=True):
+    """Minify an HTML document or fragment"""
+    minifier = HTMLMinifier(remove_comments)
+    minifier.feed(html)
+    minifier.close()
+    return minifier.take()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Single-pass HTML rewriting engine for the converters
+Parses once with lxml's C parser and makes one traversal that strips page
+chrome, picks the main content area and rewrites <img>/<a> references
+"""
+
+import re
+from html import escape
+import lxml.html
+
+DEFAULT_STRIP_TAGS = frozenset(['script', 'style', 'nav', 'footer', 'header'])
+CONTENT_CLASS = re.compile(r'content|main|post')
+IMG_TAG = re.compile(r'<img\b[^>]*>', re.I)
+# Double-quoted attributes, also as \" when the HTML sits in an escaped
+# string such as the scraper's set:html template literal
+TAG_ATTR = re.compile(r'(\s([\w:-]+)\s*=\s*(\\?)")((?:[^"\\]|\\(?!"))*)\3"')
+
+def set_img_attributes(content, attributes):
+    """Set attributes on the <img> tags of already serialized HTML
+
+    `attributes(attrs)` gets a tag's double-quoted attributes by lowercased
+    name and returns the ones to set. Existing values are replaced in place
+    and new ones appended, so the rest of the file is left byte for byte.
+    """
+    def update(match):
+        tag = match.group(0)
+        found = TAG_ATTR.findall(tag)
+        attrs = {name.lower(): value for _, name, _, value in found}
+        extra = {name: escape(value) for name, value in attributes(attrs).items()}
+        if not extra:
+            return tag
+        # New attributes are quoted the way the tag's own are
+        quote = found[0][2] + '"' if found else '"'
+        tag = TAG_ATTR.sub(lambda attr: f'{attr.group(1)}{extra.pop(attr.group(2).lower())}{attr.group(3)}"'
+                           if attr.group(2).lower() in extra else attr.group(0), tag)
+        end = len(tag) - (2 if tag.endswith('/>') else 1)
+        head = tag[:end].rstrip()
+        added = ''.join(f' {name}={quote}{value}{quote}' for name, value in extra.items())
+        return head + added + tag[len(head):]
+
+    return IMG_TAG.sub(update, content)
+
+def update_img_tags(paths, writer, attributes):
+    """Apply set_img_attributes to each file in `paths`, returning how many changed
+
+    Files are read and written through `writer`, so content still pending
+    there is patched in memory and reaches disk in the same flush.
+    """
+    rewritten = 0
+    for path in sorted(paths):
+        try:
+            content = writer.read(path)
+        except OSError:
+            continue
+        updated = set_img_attributes(content, attributes)
+        if updated != content:
+            writer.write(path, updated)
+            rewritten += 1
+    return rewritten
+
+class HtmlRewriter:
+    def __init__(self, image_src=None, link_href=None, strip_tags=DEFAULT_STRIP_TAGS, image_attrs=None):
+        # image_src(src) / link_href(href) return the rewritten value,
+        # image_attrs(src, attrs) returns extra <img> attributes to set
+        self.image_src = image_src
+        self.link_href = link_href
+        self.image_attrs = image_attrs
+        self.strip_tags = strip_tags
+
+    def walk(self, root, strip=True):
+        """Traverse `root` once, dropping stripped subtrees and collecting what we rewrite
+
+        Returns a dict with the first <title>, <main>, <article>, content-like
+        <div> and <body> found, plus every <img> and <a> outside stripped elements.
+        """
+        found = {'title': None, 'main': None, 'article': None, 'div': None, 'body': None}
+        images, links, dropped = [], [], []
+
+        stack = [root]
+        while stack:
+            element = stack.pop()
+            tag = element.tag
+            if not isinstance(tag, str):
+                continue  # comments and processing instructions
+
+            if strip and tag in self.strip_tags:
+                # Never descend, nothing inside survives
+                dropped.append(element)
+                continue
+
+            if tag == 'img':
+                images.append(element)
+            elif tag == 'a':
+                links.append(element)
+            elif tag in ('title', 'main', 'article', 'body'):
+                if found[tag] is None:
+                    found[tag] = element
+            elif tag == 'div' and found['div'] is None:
+                classes = element.get('class')
+                if classes and any(CONTENT_CLASS.search(name) for name in classes.split()):
+                    found['div'] = element
+
+            # Reversed so children are visited in document order
+            stack.extend(reversed(element))
+
+        for element in dropped:
+            element.drop_tree()  # keeps the tail text, like BeautifulSoup's decompose
+
+        found['images'] = images
+        found['links'] = links
+        return found
+
+    def rewrite(self, images, links):
+        if self.image_src or self.image_attrs:
+            for img in images:
+                src = img.get('src')
+                if not src:
+                    continue
+                if self.image_attrs:
+                    for name, value in self.image_attrs(src, img.attrib).items():
+                        img.set(name, value)
+                if self.image_src:
+                    img.set('src', self.image_src(src))
+        if self.link_href:
+            for link in links:
+                href = link.get('href')
+                if href:
+                    link.set('href', self.link_href(href))
+
+    def rewrite_fragment(self, html):
+        """Rewrite an HTML fragment such as rendered post content"""
+        if not html:
+            return ""
+        wrapper = lxml.html.fragment_fromstring(html, create_parent='div')
+        found = self.walk(wrapper, strip=False)
+        self.rewrite(found['images'], found['links'])
+
+        serialized = lxml.html.tostring(wrapper, encoding='unicode')
+        return serialized[len('<div>'):-len('</div>')]
+
+    def rewrite_document(self, content):
+        """Strip chrome from a full page and rewrite its main content
+
+        Returns a dict with the page title and the content HTML.
+        """
+        root = lxml.html.document_fromstring(content)
+        found = self.walk(root)
+
+        title = found['title'].text_content().strip() if found['title'] is not None else "Untitled"
+        main_content = found['main'] if found['main'] is not None else found['article']
+        if main_content is None:
+            main_content = found['div'] if found['div'] is not None else found['body']
+
+        if main_content is None:
+            self.rewrite(found['images'], found['links'])
+            return {'title': title, 'content': lxml.html.tostring(root, encoding='unicode')}
+
+        # Only queue images that are actually part of the kept content
+        inside = lambda element: element is main_content or main_content in element.iterancestors()
+        self.rewrite(
+            [img for img in found['images'] if inside(img)],
+            [link for link in found['links'] if inside(link)],
+        )
+        return {
+            'title': title,
+            'content': lxml.html.tostring(main_content, encoding='unicode', with_tail=False),
+        }
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP client for the WordPress conversion scripts
+Provides a keep-alive connection pool with per-request timeouts,
+backoff retries on 429/5xx responses and optional rate limiting, and
+counts what each run transfers
+"""
+
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from rate_limiter import parse_retry_after
+from metrics import metrics
+
+DEFAULT_TIMEOUT = 30
+DEFAULT_RETRIES = 3
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Left to the rate limiter when there is one, so every worker backs off together
+THROTTLE_STATUSES = (429, 503)
+
+class PooledSession(requests.Session):
+    """requests.Session that applies a default timeout to every request
+
+    With a rate_limiter every request waits for a token and a concurrency
+    slot, and 429/503 responses are retried after the limiter backs off.
+
+    Also counts requests and the bytes received for every response whose
+    body it reads (everything but stream=True downloads), as sent on the
+    wire, i.e. before gzip decoding.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, rate_limiter=None, retries=DEFAULT_RETRIES):
+        super().__init__()
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.retries = retries
+        self.requests_made = 0
+        self.bytes_received = 0
+        self.stats_lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        if self.rate_limiter is None:
+            return self.send_counted(method, url, **kwargs)
+
+        for attempt in range(self.retries + 1):
+            with self.rate_limiter.slot():
+                response = self.send_counted(method, url, **kwargs)
+            if response.status_code not in THROTTLE_STATUSES:
+                self.rate_limiter.succeeded()
+                return response
+            if attempt == self.retries:
+                break
+            delay = self.rate_limiter.throttled(parse_retry_after(response.headers.get('Retry-After')), attempt)
+            print(f"⏳ {response.status_code} from {url}, backing off {delay:.1f}s")
+            response.close()
+        return response
+
+    def send_counted(self, method, url, **kwargs):
+        start = time.perf_counter()
+        response = super().request(method, url, **kwargs)
+        # Time to headers, streamed bodies are read later by the caller
+        metrics.observe('http_request_seconds', time.perf_counter() - start, status=response.status_code)
+        received = 0
+        if not kwargs.get('stream'):
+            # urllib3 knows the raw bytes read; fall back to the decoded body
+            tell = getattr(response.raw, 'tell', None)
+            received = (tell() if tell else 0) or len(response.content)
+        with self.stats_lock:
+            self.requests_made += 1
+            self.bytes_received += received
+        metrics.increment('http_received_bytes', received)
+        return response
+
+    def transfer_summary(self):
+        return f"{self.requests_made} requests, {self.bytes_received / 1024 / 1024:.2f} MB received"
+
+def response_html(response):
+    """The body of an HTML response as text, or bytes when its encoding is unknown
+
+    requests assumes ISO-8859-1 when Content-Type names no charset, and lxml
+    given bytes only honours <meta charset>, so pages without either came out
+    as mojibake. Undeclared bodies are decoded as UTF-8 when they are valid
+    UTF-8; anything else is left as bytes for the parser's <meta> sniffing.
+    """
+    if 'charset=' in response.headers.get('Content-Type', '').lower():
+        return response.text
+    try:
+        return response.content.decode('utf-8')
+    except UnicodeDecodeError:
+        return response.content
+
+def create_session(pool_size=8, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES,
+                   backoff_factor=0.5, headers=None, rate_limiter=None):
+    """Create a pooled session sized for `pool_size` concurrent workers"""
+    statuses = RETRY_STATUSES
+    if rate_limiter:
+        statuses = tuple(status for status in RETRY_STATUSES if status not in THROTTLE_STATUSES)
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=statuses,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        # urllib3 retries any status with a Retry-After header, so leave those to the limiter too
+        respect_retry_after_header=rate_limiter is None,
+        # Hand the final 429/5xx back to the caller instead of raising,
+        # the scripts already report non-200 statuses themselves
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=retry,
+    )
+
+    session = PooledSession(timeout=timeout, rate_limiter=rate_limiter, retries=retries)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Persistent, content-addressed image cache shared by the converters
+Source URLs map to SHA-256 digests so each asset is downloaded once and
+identical bytes served from different URLs are stored only once
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from metrics import metrics
+
+DEFAULT_CACHE_DIR = ".cache/images"
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024  # 1 GB
+MAX_IMAGE_BYTES = 50 * 1024 * 1024  # Refuse single downloads above 50 MB
+CHUNK_SIZE = 64 * 1024
+
+class ImageTooLarge(Exception):
+    """Raised when a download exceeds the per-image size guard"""
+
+class ImageCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES,
+                 max_image_bytes=MAX_IMAGE_BYTES):
+        self.cache_dir = cache_dir
+        self.objects_dir = os.path.join(cache_dir, "objects")
+        self.tmp_dir = os.path.join(cache_dir, "tmp")
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.max_bytes = max_bytes
+        self.max_image_bytes = max_image_bytes
+        self.lock = threading.Lock()
+
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self.urls = {}
+        self.objects = {}
+        self.load()
+
+    def load(self):
+        """Load the URL and object index from disk"""
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Ignoring unreadable image cache index: {e}")
+            return
+
+        # Drop entries whose object file was removed behind our back
+        self.objects = {
+            digest: entry for digest, entry in index.get('objects', {}).items()
+            if os.path.exists(self.object_path(digest))
+        }
+        self.urls = {
+            url: digest for url, digest in index.get('urls', {}).items()
+            if digest in self.objects
+        }
+
+    def save(self):
+        """Evict down to the size cap and write the index to disk"""
+        with self.lock:
+            self._evict()
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'urls': self.urls, 'objects': self.objects}, f)
+            os.replace(tmp_path, self.index_path)
+
+    def object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def lookup(self, url):
+        """Return the digest cached for `url`, or None"""
+        with self.lock:
+            digest = self.urls.get(url)
+            if digest:
+                self.objects[digest]['last_used'] = time.time()
+            return digest
+
+    def fetch(self, session, url):
+        """Return the digest for `url`, streaming it into the cache on a miss
+
+        Returns None when the server does not answer with a 200.
+        """
+        digest = self.lookup(url)
+        metrics.increment('image_cache_lookups', result='hit' if digest else 'miss')
+        if digest:
+            return digest
+
+        with session.get(url, stream=True) as response:
+            if response.status_code != 200:
+                return None
+            length = response.headers.get('Content-Length')
+            if length and length.isdigit() and int(length) > self.max_image_bytes:
+                raise ImageTooLarge(f"{url} is {length} bytes")
+            return self.store(url, response.iter_content(chunk_size=CHUNK_SIZE))
+
+    def fetch_file(self, url, path):
+        """Return the digest for `url`, reading it from a local file on a miss"""
+        digest = self.lookup(url)
+        metrics.increment('image_cache_lookups', result='hit' if digest else 'miss')
+        if digest:
+            return digest
+
+        if os.path.getsize(path) > self.max_image_bytes:
+            raise ImageTooLarge(f"{path} is {os.path.getsize(path)} bytes")
+        with open(path, 'rb') as f:
+            return self.store(url, iter(lambda: f.read(CHUNK_SIZE), b''))
+
+    def store(self, url, chunks):
+        """Stream `chunks` into the cache for `url` and return their digest
+
+        Bytes go to a temp file while being hashed, then are renamed into
+        place so an interrupted download never leaves a partial object.
+        """
+        hasher = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    size += len(chunk)
+                    if size > self.max_image_bytes:
+                        raise ImageTooLarge(f"{url} exceeds {self.max_image_bytes} bytes")
+                    hasher.update(chunk)
+                    f.write(chunk)
+            # mkstemp creates 0600 files, images must stay world-readable when served
+            os.chmod(tmp_path, 0o644)
+
+            metrics.increment('image_stored_bytes', size)
+            digest = hasher.hexdigest()
+            path = self.object_path(digest)
+            with self.lock:
+                if digest not in self.objects:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.replace(tmp_path, path)
+                    self.objects[digest] = {'size': size}
+                self.objects[digest]['last_used'] = time.time()
+                self.urls[url] = digest
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        return digest
+
+    def materialize(self, digest, filepath):
+        """Atomically place the cached object at `filepath`, hard-linking when possible"""
+        source = self.object_path(digest)
+        if os.path.exists(filepath) and os.path.samefile(source, filepath):
+            return
+
+        tmp_path = f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.link(source, tmp_path)
+        except OSError:
+            # Cross-device or unsupported filesystem, fall back to a copy
+            shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, filepath)
+
+    def _evict(self):
+        """Remove least recently used objects until under max_bytes"""
+        total = sum(entry['size'] for entry in self.objects.values())
+        if total <= self.max_bytes:
+            return
+
+        by_age = sorted(self.objects.items(), key=lambda item: item[1].get('last_used', 0))
+        evicted = set()
+        for digest, entry in by_age:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self.object_path(digest))
+            except FileNotFoundError:
+                pass
+            total -= entry['size']
+            evicted.add(digest)
+
+        for digest in evicted:
+            del self.objects[digest]
+        self.urls = {url: digest for url, digest in self.urls.items() if digest not in evicted}
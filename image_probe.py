@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Header-only image dimension probing with a persistent index
+Reads just enough of each image to learn its width and height (Pillow's
+open() parses the header without decoding pixels) and remembers the
+result by content hash, with a size/mtime layer so unchanged files are
+never reread
+"""
+
+import json
+import os
+import re
+import threading
+from PIL import Image
+from html_rewriter import update_img_tags
+from file_digest import file_digest
+
+DEFAULT_INDEX_PATH = ".cache/image-dimensions.json"
+SVG_SIZE = re.compile(rb'<svg\b[^>]*?\bwidth="(\d+)(?:px)?"[^>]*?\bheight="(\d+)(?:px)?"', re.S)
+SVG_HEAD_BYTES = 4096
+
+def probe_header(path):
+    """Return (width, height) from the image header, or None if it can't be read"""
+    try:
+        with Image.open(path) as image:
+            return image.size
+    except Exception:
+        pass
+    # Pillow can't read SVG; look for explicit width/height on the root element
+    with open(path, 'rb') as f:
+        head = f.read(SVG_HEAD_BYTES)
+    match = SVG_SIZE.search(head)
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+def dimension_attrs(attrs, size):
+    """The width or height an <img> is missing, given the image's intrinsic `size`
+
+    With neither set both come from the image. With one set, the other is
+    scaled by the intrinsic aspect ratio so the rendered size doesn't change;
+    a non-pixel value like "100%" can't be scaled and is left alone.
+    """
+    width, height = (attrs.get('width') or '').strip(), (attrs.get('height') or '').strip()
+    if (width and height) or not size or not all(size):
+        return {}
+    if not width and not height:
+        return {'width': str(size[0]), 'height': str(size[1])}
+    given = width or height
+    given = given[:-2] if given.endswith('px') else given
+    if not given.isdigit():
+        return {}
+    if width:
+        return {'height': str(round(int(given) * size[1] / size[0]))}
+    return {'width': str(round(int(given) * size[0] / size[1]))}
+
+def image_loading_attrs(attrs):
+    """Return the lazy loading attributes an <img> is missing
+
+    Sizes and srcsets are added later by add_image_attributes, once the
+    images are on disk.
+    """
+    extra = {}
+    if 'loading' not in attrs:
+        extra['loading'] = 'lazy'
+    if 'decoding' not in attrs:
+        extra['decoding'] = 'async'
+    return extra
+
+def add_image_attributes(image_probe, downloads, graph, writer, responsive_images=None, public_dir="public"):
+    """Give the local <img> tags of this run's outputs their size and variant srcset
+
+    Runs once the downloads (and variant encodes) have finished. Every
+    image goes through this one pass, whether it was on disk when its page
+    was converted or downloaded during the run. So a tag gets the same
+    attributes in the same order on every run. Covers every file written
+    through `writer`, plus the outputs that use the (url, filepath) pairs
+    in `downloads`, found through the build graph. Returns the number of
+    files changed.
+    """
+    outputs = set(writer.paths)
+    for _, filepath in downloads:
+        for source in graph.dependents(filepath):
+            outputs.update(graph.outputs(source))
+
+    def attributes(attrs):
+        src = attrs.get('src') or ''
+        if not src.startswith('/') or src.startswith('//'):
+            return {}
+        filepath = os.path.join(public_dir, *src.lstrip('/').split('/'))
+        if not os.path.isfile(filepath):
+            return {}
+        size = image_probe.dimensions(filepath)
+        extra = dimension_attrs(attrs, size)
+        if responsive_images and size:
+            extra.update(responsive_images.attributes(os.path.basename(filepath), {**attrs, **extra}, size))
+        return extra
+
+    return update_img_tags(outputs, writer, attributes)
+
+class ImageProbe:
+    def __init__(self, index_path=DEFAULT_INDEX_PATH):
+        self.index_path = index_path
+        self.digests = {}
+        self.files = {}
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Load the dimension index from disk"""
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Ignoring unreadable image dimension index: {e}")
+            return
+        self.digests = index.get('digests', {})
+        self.files = index.get('files', {})
+
+    def save(self):
+        """Write the dimension index atomically"""
+        os.makedirs(os.path.dirname(self.index_path) or '.', exist_ok=True)
+        with self.lock:
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'digests': self.digests, 'files': self.files}, f)
+            os.replace(tmp_path, self.index_path)
+
+    def dimensions(self, path, digest=None):
+        """Return (width, height) for the image at `path`, or None
+
+        Pass `digest` when the content hash is already known (e.g. from the
+        image cache) to skip hashing. Otherwise a file whose size and mtime
+        match the last probe is answered from the index with a single stat.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        signature = [stat.st_size, stat.st_mtime_ns]
+
+        with self.lock:
+            known = self.files.get(path)
+            if digest is None and known and known[:2] == signature:
+                digest = known[2]
+            if digest in self.digests:
+                self.files[path] = signature + [digest]
+                size = self.digests[digest]
+                return tuple(size) if size else None
+
+        if digest is None:
+            digest = file_digest(path)
+        size = probe_header(path)
+        with self.lock:
+            self.digests[digest] = list(size) if size else None
+            self.files[path] = signature + [digest]
+        return size
+
+    def index_tree(self, root, extensions=('.png', '.jpg', '.jpeg', '.gif', '.webp', '.avif', '.svg', '.bmp', '.ico')):
+        """Probe every image under `root`, returning how many were indexed"""
+        count = 0
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                # public/images files have no extension, so also probe anything there
+                if filename.lower().endswith(extensions) or os.path.basename(directory) == 'images':
+                    if self.dimensions(path):
+                        count += 1
+        return count
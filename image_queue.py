@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Background image download queue for the converters
+Pages rewrite <img> tags to their planned local paths straight away and
+the actual downloads run here, overlapped with parsing
+"""
+
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+from metrics import metrics
+
+class ImageDownloadQueue:
+    def __init__(self, image_cache, session=None, max_workers=8, per_host=4, fetch_image=None):
+        self.image_cache = image_cache
+        # fetch_image(url) -> digest lets offline sources read images from disk
+        self.fetch_image = fetch_image or (lambda image_url: image_cache.fetch(session, image_url))
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.executor = None
+        self.pending = {}
+        # (image_url, filepath) of every download that finished successfully
+        self.completed = []
+        self.lock = threading.Lock()
+        self.host_slots = defaultdict(lambda: threading.BoundedSemaphore(self.per_host))
+
+    def submit(self, image_url, filepath):
+        """Queue `image_url` to be downloaded to `filepath`, once per target"""
+        with self.lock:
+            if filepath in self.pending:
+                return
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            future = self.executor.submit(self._download, image_url, filepath)
+            self.pending[filepath] = (image_url, future)
+
+    def _download(self, image_url, filepath):
+        with self.lock:
+            slot = self.host_slots[urlparse(image_url).netloc]
+        # Timed from when the host slot is free, waiting for it isn't image work
+        with slot:
+            start = time.perf_counter()
+            digest = self.fetch_image(image_url)
+        if not digest:
+            metrics.increment('image_failures')
+            raise RuntimeError("image could not be fetched")
+        self.image_cache.materialize(digest, filepath)
+        metrics.observe('image_seconds', time.perf_counter() - start)
+        with self.lock:
+            self.completed.append((image_url, filepath))
+
+    def drain(self):
+        """Wait for every queued download and return the (url, filepath, error) failures"""
+        with self.lock:
+            pending = list(self.pending.items())
+            executor = self.executor
+            self.pending = {}
+            self.executor = None
+
+        if executor is None:
+            return []
+
+        print(f"\n🖼️  Waiting for {len(pending)} image downloads...")
+        wait([future for _, (_, future) in pending])
+        executor.shutdown()
+
+        failures = []
+        for filepath, (image_url, future) in pending:
+            error = future.exception()
+            if error:
+                print(f"❌ Error downloading image {image_url}: {error}")
+                failures.append((image_url, filepath, error))
+        return failures
+
+def restore_remote_sources(failures, graph, writer, public_dir="public"):
+    """Point outputs back at the remote URL of every image that failed to download
+
+    Sources are rewritten to the planned local path before the download
+    runs, so without this a failed download leaves a broken <img>. Images an
+    earlier run already saved keep their local path. Outputs are found
+    through the build graph and patched through `writer`, so content still
+    pending is fixed in memory before it is ever written; returns how many.
+    """
+    replacements = {}
+    for image_url, filepath, _ in failures:
+        if os.path.exists(filepath):
+            continue
+        local_url = '/' + os.path.relpath(filepath, public_dir).replace(os.sep, '/')
+        # Not followed by more of a file name, so wp_a-png doesn't match wp_a-png-2
+        pattern = re.compile(re.escape(local_url) + r'(?![\w.-])')
+        for source in graph.dependents(filepath):
+            for output in graph.outputs(source):
+                replacements.setdefault(output, []).append((pattern, image_url))
+
+    restored = 0
+    for output, patterns in replacements.items():
+        try:
+            content = writer.read(output)
+        except OSError:
+            continue
+        updated = content
+        for pattern, image_url in patterns:
+            updated = pattern.sub(lambda _: image_url, updated)
+        if updated != content:
+            writer.write(output, updated)
+            restored += 1
+    return restored
+
+class ImageCollector:
+    """Stands in for the queue inside worker processes, recording planned downloads
+
+    The parent process takes the collected (url, filepath) pairs and submits
+    them to its real ImageDownloadQueue.
+    """
+
+    def __init__(self):
+        self.collected = []
+
+    def submit(self, image_url, filepath):
+        self.collected.append((image_url, filepath))
+
+    def take(self):
+        """Return and forget everything collected so far"""
+        collected, self.collected = self.collected, []
+        return collected
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Responsive image variants for converted content
+Encodes downloaded images as WebP/AVIF at standard widths with Pillow,
+caches the encodes by source content hash and supplies the srcset/sizes
+attributes that point <img> tags at them. A srcset only lists variants
+that were actually encoded, at their real widths
+"""
+
+import multiprocessing
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlparse
+from PIL import Image, features
+from file_digest import file_digest
+
+STANDARD_WIDTHS = (320, 640, 960, 1280, 1920)
+DEFAULT_CACHE_DIR = ".cache/variants"
+# Formats Pillow can decode reliably; SVG, GIF animations etc. are left alone
+SOURCE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+def variant_widths(widths, original_width):
+    """The widths an image `original_width` pixels wide is encoded at
+
+    The standard widths below the original, plus the original itself unless
+    it is wider than all of them, so nothing is upscaled and every srcset
+    descriptor is the candidate's true width.
+    """
+    targets = [width for width in widths if width < original_width]
+    if original_width <= max(widths):
+        targets.append(original_width)
+    return targets
+
+def encode_variants(source_path, cache_dir, widths, image_format, quality):
+    """Encode `source_path` at its variant_widths, reusing cached encodes
+
+    Returns {width: cached file path}. Runs in a worker process.
+    """
+    digest = file_digest(source_path)
+    out_dir = os.path.join(cache_dir, digest[:2], digest)
+    os.makedirs(out_dir, exist_ok=True)
+
+    with Image.open(source_path) as image:
+        original_width, original_height = image.size
+        encoded = {}
+        for target in variant_widths(widths, original_width):
+            path = os.path.join(out_dir, f"{target}-q{quality}.{image_format}")
+            if not os.path.exists(path):
+                if image.mode not in ('RGB', 'RGBA'):
+                    image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+                height = max(1, round(original_height * target / original_width))
+                resized = image if target == original_width else image.resize((target, height), Image.LANCZOS)
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                resized.save(tmp_path, image_format.upper(), quality=quality)
+                os.replace(tmp_path, path)
+            encoded[target] = path
+
+    return encoded
+
+class ResponsiveImages:
+    def __init__(self, images_dir="public/images", image_format='webp', widths=STANDARD_WIDTHS,
+                 quality=80, cache_dir=DEFAULT_CACHE_DIR, workers=None):
+        if not features.check(image_format):
+            raise ValueError(f"Pillow was built without {image_format} support")
+        self.images_dir = images_dir
+        self.variants_dir = os.path.join(images_dir, "variants")
+        self.image_format = image_format
+        self.widths = tuple(widths)
+        self.quality = quality
+        self.cache_dir = cache_dir
+        self.workers = workers or os.cpu_count()
+
+    def eligible(self, image_url):
+        return os.path.splitext(urlparse(image_url).path)[1].lower() in SOURCE_EXTENSIONS
+
+    def variant_name(self, filename, width):
+        return f"{filename}-{width}.{self.image_format}"
+
+    def srcset_attrs(self, filename, widths, attrs):
+        srcset = ", ".join(
+            f"/images/variants/{self.variant_name(filename, width)} {width}w" for width in widths
+        )
+        sizes = attrs.get('sizes')
+        if not sizes:
+            width = attrs.get('width', '')
+            sizes = f"(max-width: {width}px) 100vw, {width}px" if width.isdigit() else "100vw"
+        return {'srcset': srcset, 'sizes': sizes}
+
+    def attributes(self, filename, attrs, size):
+        """Return the srcset/sizes attributes for an <img> whose image is saved as `filename`
+
+        `size` is the image's intrinsic (width, height). Images whose
+        variants weren't all encoded (not eligible, or failed) get none.
+        """
+        widths = variant_widths(self.widths, size[0])
+        if not all(os.path.exists(os.path.join(self.variants_dir, self.variant_name(filename, width)))
+                   for width in widths):
+            return {}
+        return self.srcset_attrs(filename, widths, attrs)
+
+    def generate(self, downloads):
+        """Encode variants for the downloaded (image_url, filepath) pairs across cores
+
+        Images that fail to encode are left without variants and keep
+        serving the original alone.
+        """
+        jobs = [(image_url, filepath) for image_url, filepath in downloads
+                if self.eligible(image_url) and os.path.exists(filepath)]
+        if not jobs:
+            return
+
+        print(f"\n🖼️  Generating {self.image_format} variants for {len(jobs)} images...")
+        os.makedirs(self.variants_dir, exist_ok=True)
+
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = [
+                (filepath, pool.submit(encode_variants, filepath, self.cache_dir, self.widths,
+                                       self.image_format, self.quality))
+                for _, filepath in jobs
+            ]
+            for filepath, future in futures:
+                filename = os.path.basename(filepath)
+                try:
+                    encoded = future.result()
+                except Exception as e:
+                    print(f"❌ Error encoding variants for {filepath}: {e}")
+                    continue
+
+                for width, cached_path in encoded.items():
+                    self.place(cached_path, os.path.join(self.variants_dir, self.variant_name(filename, width)))
+
+    def place(self, source, filepath):
+        """Atomically hard-link (or copy) `source` to `filepath` unless already there"""
+        if os.path.exists(filepath) and os.path.samefile(source, filepath):
+            return
+        tmp_path = f"{filepath}.{os.getpid()}.tmp"
+        try:
+            os.link(source, tmp_path)
+        except OSError:
+            shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, filepath)
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Run metrics and profiling for the converters and fixers
+Counters and histograms are recorded in a process-wide registry as a run
+goes (HTTP latency and bytes, parse, image and write time, per-item and
+per-stage time) and written at the end as a JSON summary plus a Prometheus
+textfile. Profiling with cProfile or a sampling profiler is opt-in
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+PREFIX = "wp_astro_"
+# Seconds, from a cached lookup to a slow page fetch
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+PROFILE_MODES = ('cprofile', 'sample')
+SAMPLE_INTERVAL = 0.005
+
+def series_key(name, labels):
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def label_text(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + '}'
+
+class Histogram:
+    """Per-bucket counts (not cumulative) plus the count, sum and max of observed values"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        # One count per bucket and a last one for values above every bound
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        index = 0
+        while index < len(self.buckets) and value > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def merge(self, snapshot):
+        if tuple(snapshot['buckets']) != self.buckets:
+            raise ValueError("Cannot merge histograms with different buckets")
+        self.counts = [a + b for a, b in zip(self.counts, snapshot['counts'])]
+        self.count += snapshot['count']
+        self.sum += snapshot['sum']
+        self.max = max(self.max, snapshot['max'])
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile, capped at the max seen"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self):
+        return {'buckets': list(self.buckets), 'counts': list(self.counts), 'count': self.count,
+                'sum': self.sum, 'max': self.max}
+
+class Metrics:
+    """Thread-safe registry of counters, gauges and histograms keyed by name and labels
+
+    Worker processes record into their own registry and hand take() to the
+    parent, which merge()s it, the same way image and write collectors work.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+        # (name, start) of the stage the run is in, see stage()
+        self.current_stage = None
+
+    def increment(self, name, value=1, **labels):
+        key = series_key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self.lock:
+            self.gauges[series_key(name, labels)] = value
+
+    def observe(self, name, value, buckets=DEFAULT_BUCKETS, **labels):
+        key = series_key(name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe how long the block takes in seconds, whether or not it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def stage(self, name=None):
+        """End the current stage and start `name`, recorded as stage_seconds{stage=...}
+
+        Stages run one after another on the main thread; stage() with no
+        name just ends the current one.
+        """
+        now = time.perf_counter()
+        with self.lock:
+            previous, self.current_stage = self.current_stage, (name, now) if name else None
+        if previous:
+            self.observe('stage_seconds', now - previous[1], stage=previous[0])
+
+    def take(self):
+        """Return everything recorded so far and start over"""
+        with self.lock:
+            snapshot = {
+                'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                'histograms': [[name, list(labels), histogram.snapshot()]
+                               for (name, labels), histogram in self.histograms.items()],
+            }
+            self.counters = {}
+            self.histograms = {}
+        return snapshot
+
+    def merge(self, snapshot):
+        """Add a take() snapshot from another process to this registry"""
+        with self.lock:
+            for name, labels, value in snapshot['counters']:
+                key = (name, tuple(map(tuple, labels)))
+                self.counters[key] = self.counters.get(key, 0) + value
+            for name, labels, data in snapshot['histograms']:
+                key = (name, tuple(map(tuple, labels)))
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    histogram = self.histograms[key] = Histogram(data['buckets'])
+                histogram.merge(data)
+
+    def summary(self):
+        """JSON-friendly view: counter values, gauges and histogram statistics"""
+        with self.lock:
+            counters = sorted(self.counters.items())
+            gauges = sorted(self.gauges.items())
+            histograms = sorted(self.histograms.items())
+        return {
+            'counters': [{'name': name, 'labels': dict(labels), 'value': value} for (name, labels), value in counters],
+            'gauges': [{'name': name, 'labels': dict(labels), 'value': value} for (name, labels), value in gauges],
+            'histograms': [{
+                'name': name,
+                'labels': dict(labels),
+                'count': histogram.count,
+                'sum': round(histogram.sum, 6),
+                'mean': round(histogram.sum / histogram.count, 6) if histogram.count else 0,
+                'p50': round(histogram.quantile(0.5), 6),
+                'p95': round(histogram.quantile(0.95), 6),
+                'max': round(histogram.max, 6),
+            } for (name, labels), histogram in histograms],
+        }
+
+    def prometheus(self, job=None):
+        """Prometheus text exposition format, for node_exporter's textfile collector
+
+        Every series gets a job label when `job` is given, so several scripts
+        can write textfiles to the same directory without clashing.
+        """
+        with self.lock:
+            counters = sorted(self.counters.items())
+            gauges = sorted(self.gauges.items())
+            histograms = sorted((key, histogram.snapshot()) for key, histogram in self.histograms.items())
+        lines = []
+        declared = set()
+        common = (('job', job),) if job else ()
+
+        def declare(name, kind):
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            metric = f"{PREFIX}{name}_total"
+            declare(metric, 'counter')
+            lines.append(f"{metric}{label_text(common + labels)} {value}")
+        for (name, labels), value in gauges:
+            metric = f"{PREFIX}{name}"
+            declare(metric, 'gauge')
+            lines.append(f"{metric}{label_text(common + labels)} {value}")
+        for (name, labels), data in histograms:
+            metric = f"{PREFIX}{name}"
+            declare(metric, 'histogram')
+            cumulative = 0
+            for bound, count in zip(data['buckets'] + ['+Inf'], data['counts']):
+                cumulative += count
+                lines.append(f"{metric}_bucket{label_text(common + labels, [('le', str(bound))])} {cumulative}")
+            lines.append(f"{metric}_sum{label_text(common + labels)} {data['sum']}")
+            lines.append(f"{metric}_count{label_text(common + labels)} {data['count']}")
+        return '\n'.join(lines) + '\n'
+
+    def save(self, path, job):
+        """Write the JSON summary to `path` and the Prometheus textfile beside it as .prom"""
+        self.set('last_run_timestamp_seconds', round(time.time()))
+        summary = {'job': job, **self.summary()}
+        write_file(path, json.dumps(summary, indent=2) + '\n')
+        prom_path = os.path.splitext(path)[0] + '.prom'
+        write_file(prom_path, self.prometheus(job))
+        return prom_path
+
+# The registry every module records into
+metrics = Metrics()
+
+class SamplingProfiler:
+    """Samples the stacks of every thread at an interval, as folded stacks
+
+    Unlike cProfile it sees the download and scrape threads too, and costs
+    little enough to leave on for a whole nightly run. The output works
+    with flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        own_id = threading.get_ident()
+        while not self.stopped.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def folded(self):
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+def write_file(path, content):
+    # Imported here, output_writer records its writes in the registry above
+    from output_writer import write_if_changed
+    write_if_changed(path, content)
+
+def add_metrics_arguments(parser):
+    """Add the --metrics and --profile options to a script's argument parser"""
+    parser.add_argument('--metrics', metavar='PATH',
+                        help="Write a JSON metrics summary to PATH and a Prometheus textfile next to it (.prom)")
+    parser.add_argument('--profile', choices=PROFILE_MODES,
+                        help="Profile the run with cProfile (main thread) or a sampling profiler (all threads)")
+    parser.add_argument('--profile-output', metavar='PATH',
+                        help="Profile output (default: .cache/profiles/<script>.prof or .folded)")
+
+@contextmanager
+def instrumented(args, job):
+    """Run the block under the profiler chosen in `args` and write the metrics when it ends"""
+    profiler = None
+    if args.profile == 'cprofile':
+        profiler = cProfile.Profile()
+        profiler.enable()
+    elif args.profile == 'sample':
+        profiler = SamplingProfiler()
+        profiler.start()
+    start = time.perf_counter()
+    try:
+        yield metrics
+    finally:
+        metrics.stage()
+        metrics.set('run_seconds', round(time.perf_counter() - start, 3))
+        if profiler:
+            save_profile(profiler, args.profile_output or default_profile_path(job, args.profile))
+        if args.metrics:
+            prom_path = metrics.save(args.metrics, job)
+            print(f"📈 Metrics: {args.metrics}, {prom_path}")
+
+def default_profile_path(job, mode):
+    return os.path.join(".cache", "profiles", f"{job}.{'prof' if mode == 'cprofile' else 'folded'}")
+
+def save_profile(profiler, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    if isinstance(profiler, SamplingProfiler):
+        profiler.stop()
+        write_file(path, profiler.folded())
+        print(f"🔬 Profile: {sum(profiler.stacks.values())} samples in {path}")
+        return
+    profiler.disable()
+    profiler.dump_stats(path)
+    report = io.StringIO()
+    pstats.Stats(profiler, stream=report).sort_stats('cumulative').print_stats(15)
+    print(f"🔬 Profile: {path}, top functions by cumulative time:")
+    print(report.getvalue())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Shared output layer for the converters and fixers
+Files are only written when their bytes actually change, and changes land
+atomically via a temp file and rename, so the Astro dev server never sees
+a half-written file or rebuilds for nothing. Writes are buffered and
+flushed together so the file watcher sees one burst instead of a trickle
+"""
+
+import os
+import tempfile
+import threading
+import time
+from metrics import metrics
+
+DEFAULT_MAX_PENDING_BYTES = 16 * 1024 * 1024
+
+def write_if_changed(path, content, encoding='utf-8'):
+    """Atomically write `content` to `path` unless it already holds those bytes
+
+    Returns True if the file was written.
+    """
+    data = content.encode(encoding) if isinstance(content, str) else content
+    try:
+        # Different sizes can't be equal, so most changes never read the old file
+        if os.path.getsize(path) == len(data):
+            with open(path, 'rb') as f:
+                if f.read() == data:
+                    return False
+        mode = os.stat(path).st_mode & 0o777
+    except OSError:
+        mode = 0o644
+
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return True
+
+class OutputWriter:
+    """Buffers output files and writes the changed ones in batches
+
+    Pending writes are flushed once they exceed `max_pending_bytes` and by
+    an explicit flush() at the end of a run; 0 writes straight through.
+    Later writes to the same path replace earlier pending ones.
+    """
+
+    def __init__(self, max_pending_bytes=DEFAULT_MAX_PENDING_BYTES):
+        self.max_pending_bytes = max_pending_bytes
+        self.pending = {}
+        self.pending_bytes = 0
+        # Every path written through this writer, whether pending or flushed
+        self.paths = set()
+        self.written = 0
+        self.unchanged = 0
+        self.lock = threading.Lock()
+
+    def write(self, path, content):
+        with self.lock:
+            previous = self.pending.pop(path, None)
+            if previous is not None:
+                self.pending_bytes -= len(previous)
+            self.pending[path] = content
+            self.pending_bytes += len(content)
+            self.paths.add(path)
+            over_limit = self.pending_bytes >= self.max_pending_bytes
+        if over_limit:
+            self.flush()
+
+    def read(self, path):
+        """Return what `path` will hold after the next flush: its pending content, else the file's
+
+        Raises OSError when the path is neither pending nor on disk.
+        """
+        with self.lock:
+            content = self.pending.get(path)
+        if content is not None:
+            return content
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def flush(self):
+        """Write every pending file whose content changed"""
+        with self.lock:
+            pending, self.pending, self.pending_bytes = self.pending, {}, 0
+            for path, content in pending.items():
+                start = time.perf_counter()
+                if write_if_changed(path, content):
+                    self.written += 1
+                    metrics.increment('files_written')
+                    metrics.increment('written_bytes', len(content))
+                else:
+                    self.unchanged += 1
+                    metrics.increment('files_unchanged')
+                metrics.observe('write_seconds', time.perf_counter() - start)
+
+    def summary(self):
+        return f"{self.written} files written, {self.unchanged} unchanged"
+
+class WriteCollector:
+    """Stands in for the writer inside worker processes, recording writes
+
+    The parent process takes the collected (path, content) pairs and hands
+    them to its real OutputWriter.
+    """
+
+    def __init__(self):
+        self.collected = []
+
+    def write(self, path, content):
+        self.collected.append((path, content))
+
+    def take(self):
+        collected, self.collected = self.collected, []
+        return collected
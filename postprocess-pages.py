@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Post-process generated Astro pages in a single pass
+Runs every registered fix from astro_fixes.py (or a chosen subset) over
+each .astro file, nested directories included, reading and writing each
+file at most once
+"""
+
+import argparse
+from astro_fixes import TRANSFORMS, process_pages
+from metrics import add_metrics_arguments, instrumented
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply the Astro page fixes in one pass")
+    parser.add_argument('paths', nargs='*', default=["src/pages"], help="Files or directories (default: src/pages)")
+    parser.add_argument('--only', help="Comma-separated transforms to run, in registration order")
+    parser.add_argument('--list', action='store_true', help="List the registered transforms and exit")
+    parser.add_argument('--workers', type=int, help="Processes to use (default: one per CPU)")
+    parser.add_argument('--dry-run', action='store_true', help="Report what would change without writing")
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+    
+    if args.list:
+        for name, func in TRANSFORMS:
+            print(f"{name:<24} {func.__doc__}")
+        return
+    
+    names = args.only.split(',') if args.only else None
+    with instrumented(args, 'postprocess-pages'):
+        process_pages(args.paths, names, args.workers, args.dry_run)
+
+if __name__ == "__main__":
+    main()
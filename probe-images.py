@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+Index the intrinsic dimensions of every image under public/
+Warms the header-only probe index the converters read when adding
+width/height to <img> tags; unchanged files cost a single stat
+"""
+
+import sys
+import time
+from image_probe import ImageProbe
+
+def main():
+    root = sys.argv[1] if len(sys.argv) > 1 else "public"
+    
+    start = time.perf_counter()
+    probe = ImageProbe()
+    count = probe.index_tree(root)
+    probe.save()
+    
+    print(f"✅ Indexed {count} images under {root}/ in {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Prune the Oxygen/WordPress stylesheets to the rules the pages use
+Writes trimmed copies under public/pruned, site-wide or per route, and
+optionally a critical-CSS block the layout inlines while the full
+stylesheets load without blocking render. The layout reads everything
+from src/styles/pruned-styles.json; --reset points it back at the originals
+"""
+
+import argparse
+from css_pruner import CssPruner, DEFAULT_CRITICAL_BYTES, DEFAULT_OUTPUT_DIR
+from output_writer import OutputWriter
+
+def main():
+    parser = argparse.ArgumentParser(description="Remove CSS rules no page can match")
+    parser.add_argument('--pages-dir', default="src/pages", help="Astro pages (default: src/pages)")
+    parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR,
+                        help=f"Where pruned stylesheets go (default: {DEFAULT_OUTPUT_DIR})")
+    parser.add_argument('--per-route', action='store_true',
+                        help="Give every page one stylesheet holding just the rules it uses")
+    parser.add_argument('--critical', nargs='?', type=int, const=DEFAULT_CRITICAL_BYTES, metavar='BYTES',
+                        help="Inline the rules for the header and the first BYTES of each page "
+                             f"(default: {DEFAULT_CRITICAL_BYTES}) and load the rest without blocking render")
+    parser.add_argument('--safelist', action='append', default=[], metavar='REGEX',
+                        help="Always keep classes and ids matching REGEX; repeatable")
+    parser.add_argument('--reset', action='store_true', help="Go back to the original stylesheets")
+    parser.add_argument('--dry-run', action='store_true', help="Report sizes without writing")
+    args = parser.parse_args()
+
+    pruner = CssPruner(args.pages_dir, output_dir=args.output_dir, safelist=args.safelist)
+    writer = OutputWriter()
+    if args.reset:
+        pruner.reset(writer)
+        writer.flush()
+        print("✅ Layout uses the original stylesheets again")
+        return
+
+    manifest = pruner.run(writer, args.per_route, args.critical, args.dry_run)
+    writer.flush()
+    if args.critical:
+        sizes = [len(entry['critical']) for entry in manifest['routes'].values()]
+        if sizes:
+            print(f"🎯 Critical CSS: {min(sizes) / 1024:.0f}-{max(sizes) / 1024:.0f} KB inlined per page")
+    if not args.dry_run:
+        print(f"💾 Output: {writer.summary()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Adaptive request rate limiting for the scrapers
+A token bucket caps requests per second and a semaphore caps requests in
+flight. A 429/503 pauses every worker for the server's Retry-After (or an
+exponential backoff) and halves the rate, which then creeps back up as
+requests succeed
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+DEFAULT_RATE = 5.0
+DEFAULT_CONCURRENCY = 4
+MAX_BACKOFF = 60
+
+def parse_retry_after(value):
+    """Return the delay in seconds a Retry-After header asks for, or None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+class RateLimiter:
+    def __init__(self, rate=DEFAULT_RATE, concurrency=DEFAULT_CONCURRENCY, burst=None,
+                 backoff_factor=1.0, max_backoff=MAX_BACKOFF):
+        # rate is requests per second, 0 for no limit (Retry-After is still honoured)
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = rate / 16
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(concurrency)
+
+    def acquire(self):
+        """Block until a request may start"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if self.rate:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                wait = self.paused_until - now
+                if wait <= 0:
+                    if not self.rate:
+                        return
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    @contextmanager
+    def slot(self):
+        """Hold one of the concurrency slots for the duration of a request"""
+        with self.slots:
+            self.acquire()
+            yield
+
+    def throttled(self, retry_after=None, attempt=0):
+        """Back off after a 429/503, returning the delay applied to every worker"""
+        delay = retry_after if retry_after is not None else self.backoff_factor * 2 ** attempt
+        delay = min(delay, self.max_backoff)
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + delay)
+            if self.rate:
+                self.rate = max(self.min_rate, self.rate / 2)
+                self.tokens = min(self.tokens, 1.0)
+        return delay
+
+    def succeeded(self):
+        """Recover a tenth of the configured rate per successful request"""
+        if self.rate and self.rate < self.max_rate:
+            with self.lock:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
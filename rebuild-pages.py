@@ -1,11 +1,17 @@
 #!/usr/bin/env python3
 
-import requests
 from bs4 import BeautifulSoup
 import os
 import re
 from urllib.parse import urljoin, urlparse
-import time
+from concurrent.futures import ThreadPoolExecutor
+from http_client import create_session
+from rate_limiter import RateLimiter, DEFAULT_RATE, DEFAULT_CONCURRENCY
+from response_cache import ResponseCache
+from build_graph import BuildGraph
+from output_writer import OutputWriter
+from html_minifier import minify_html
+from metrics import metrics, add_metrics_arguments, instrumented
 
 def clean_title(title):
     """Clean and format page titles"""
@@ -15,49 +21,64 @@ def clean_title(title):
     title = re.sub(r'\s+description:\s*$', '', title)
     return title
 
-def extract_page_content(url, page_name):
-    """Extract content from a WordPress page"""
+def placeholder_content(page_name):
+    return f'<div class="ct-section"><div class="ct-section-inner-wrap"><h2 class="ct-headline">{page_name.title()}</h2><p>Content coming soon...</p></div></div>'
+
+def extract_page_content(url, page_name, session, response_cache, conditional=False):
+    """Extract content from a WordPress page, returning None if it is unchanged
+
+    Otherwise returns (title, content, extracted); extracted is False when
+    the content is a placeholder because the page couldn't be fetched or read.
+    """
     try:
         print(f"Scraping {page_name} from {url}")
-        response = requests.get(url, timeout=30)
+        response = response_cache.get(session, url, conditional=conditional)
+        if response.status_code == 304:
+            return None
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Extract title
-        title_tag = soup.find('title')
-        title = clean_title(title_tag.get_text()) if title_tag else page_name.title()
-        
-        # Find the main content area
-        content_div = soup.find('div', class_='ct-inner-content')
-        if not content_div:
-            # Fallback to looking for content in other common containers
-            content_div = soup.find('div', class_='entry-content') or soup.find('main')
+        with metrics.timer('parse_seconds'):
+            soup = BeautifulSoup(response.content, 'html.parser')
+            
+            # Extract title
+            title_tag = soup.find('title')
+            title = clean_title(title_tag.get_text()) if title_tag else page_name.title()
+            
+            # Find the main content area
+            content_div = soup.find('div', class_='ct-inner-content')
+            if not content_div:
+                # Fallback to looking for content in other common containers
+                content_div = soup.find('div', class_='entry-content') or soup.find('main')
         
         if content_div:
             # Get all the HTML content
             content_html = str(content_div)
-            # Clean up the HTML
-            content_html = re.sub(r'\s+', ' ', content_html)
-            content_html = re.sub(r'>\s+<', '><', content_html)
+            with metrics.timer('minify_seconds'):
+                content_html = minify_html(content_html)
         else:
-            content_html = f'<div class="ct-section"><div class="ct-section-inner-wrap"><h2 class="ct-headline">{page_name.title()}</h2><p>Content coming soon...</p></div></div>'
+            return title, placeholder_content(page_name), False
         
-        return title, content_html
+        return title, content_html, True
         
     except Exception as e:
         print(f"Error scraping {page_name}: {e}")
-        return page_name.title(), f'<div class="ct-section"><div class="ct-section-inner-wrap"><h2 class="ct-headline">{page_name.title()}</h2><p>Content coming soon...</p></div></div>'
+        metrics.increment('item_failures', kind='pages')
+        return page_name.title(), placeholder_content(page_name), False
+
+def astro_page_path(page_name, is_service=False):
+    """Return the Astro page path written for a page"""
+    if is_service:
+        return f"src/pages/services/{page_name}.astro"
+    return f"src/pages/{page_name}.astro"
 
-def create_astro_page(page_name, title, content, is_service=False):
+def create_astro_page(page_name, title, content, writer, is_service=False):
     """Create an Astro page with proper Oxygen styling"""
     
     # Determine the file path
+    file_path = astro_page_path(page_name, is_service)
     if is_service:
-        file_path = f"src/pages/services/{page_name}.astro"
         layout_import = "../../layouts/Layout.astro"
     else:
-        file_path = f"src/pages/{page_name}.astro"
         layout_import = "../layouts/Layout.astro"
     
     # Create the Astro content
@@ -75,15 +96,28 @@ const description = '';
 </Layout>
 '''
     
-    # Write the file
-    os.makedirs(os.path.dirname(file_path), exist_ok=True)
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(astro_content)
+    # Written with the other pages once all are rebuilt
+    writer.write(file_path, astro_content)
     
     print(f"Created {file_path}")
 
 def main():
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Rebuild Astro pages from the live WordPress site")
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help=f"Requests per second to the site, 0 for no limit (default: {DEFAULT_RATE:g})")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Requests in flight at once (default: {DEFAULT_CONCURRENCY})")
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+    
     base_url = "https://iowaallpro2.republicleadhunter.com"
+    # One pooled connection per worker, or urllib3 discards the extras
+    session = create_session(pool_size=args.concurrency, rate_limiter=RateLimiter(args.rate, args.concurrency))
+    response_cache = ResponseCache()
+    graph = BuildGraph()
+    writer = OutputWriter()
     
     # Define all pages to scrape
     pages = [
@@ -102,12 +136,36 @@ def main():
         ("services/commercial-hvac", "Commercial HVAC Services", True),
     ]
     
-    for page_path, page_name, is_service in pages:
+    def rebuild(page):
+        page_path, page_name, is_service = page
         url = f"{base_url}/{page_path}/"
-        title, content = extract_page_content(url, page_name)
-        create_astro_page(page_path.split('/')[-1], title, content, is_service)
-        time.sleep(1)  # Be respectful to the server
+        file_name = page_path.split('/')[-1]
+        
+        # Only revalidate pages whose Astro file is still on disk
+        conditional = os.path.exists(astro_page_path(file_name, is_service))
+        with metrics.timer('item_seconds', kind='pages'):
+            extracted = extract_page_content(url, page_name, session, response_cache, conditional)
+            if extracted is None:
+                print(f"Skipping {page_name}, not modified since last rebuild")
+            else:
+                title, content, found = extracted
+                create_astro_page(file_name, title, content, writer, is_service)
+                # A placeholder must not be kept by a 304 on the next run
+                if found:
+                    response_cache.commit(url)
+                graph.record(url, [astro_page_path(file_name, is_service)])
     
+    with instrumented(args, 'rebuild-pages'):
+        # The session's rate limiter paces the workers
+        metrics.stage('rebuild_pages')
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            list(executor.map(rebuild, pages))
+        
+        metrics.stage('write_outputs')
+        writer.flush()
+        print(f"Output: {writer.summary()}")
+        response_cache.save()
+        graph.save()
     print("All pages have been rebuilt with proper Oxygen styling!")
 
 if __name__ == "__main__":
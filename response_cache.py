@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Conditional-request cache for scraped pages
+Remembers each page's ETag/Last-Modified and revalidates with
+If-None-Match/If-Modified-Since so unchanged pages come back as a
+bodiless 304 and can be skipped entirely
+"""
+
+import json
+import os
+import threading
+
+DEFAULT_CACHE_PATH = ".cache/responses.json"
+
+VALIDATORS = (
+    ('ETag', 'If-None-Match'),
+    ('Last-Modified', 'If-Modified-Since'),
+)
+
+class ResponseCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        self.entries = {}
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Load stored validators from disk"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Ignoring unreadable response cache: {e}")
+
+    def save(self):
+        """Write committed validators to disk atomically"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with self.lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+    def get(self, session, url, conditional=True, **kwargs):
+        """GET `url`, revalidating against stored validators when `conditional`
+
+        A 304 response means the page is unchanged since it was last committed.
+        Validators from a 200 are held back until commit(url) is called, so a
+        page whose outputs were never written is not skipped on the next run.
+        """
+        headers = dict(kwargs.pop('headers', None) or {})
+        if conditional:
+            with self.lock:
+                stored = self.entries.get(url, {})
+            for response_header, request_header in VALIDATORS:
+                if stored.get(response_header):
+                    headers[request_header] = stored[response_header]
+
+        response = session.get(url, headers=headers, **kwargs)
+
+        if response.status_code == 200:
+            validators = {
+                response_header: response.headers[response_header]
+                for response_header, _ in VALIDATORS
+                if response.headers.get(response_header)
+            }
+            with self.lock:
+                if validators:
+                    self.pending[url] = validators
+                else:
+                    self.entries.pop(url, None)
+        return response
+
+    def commit(self, url):
+        """Keep the validators of the last 200 for `url` once its outputs are written"""
+        with self.lock:
+            if url in self.pending:
+                self.entries[url] = self.pending.pop(url)
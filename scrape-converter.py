@@ -4,161 +4,194 @@ WordPress Page Scraper for Design Conversion
 This script scrapes the actual rendered WordPress pages to preserve design and content
 """
 
-import requests
 import json
 import os
-import re
 from datetime import datetime
 from urllib.parse import urljoin, urlparse
 from slugify import slugify
-from bs4 import BeautifulSoup
-import time
+from http_client import create_session, response_html
+from rate_limiter import RateLimiter, DEFAULT_RATE, DEFAULT_CONCURRENCY
+from url_discovery import CrawlFrontier, SitemapDiscovery
+from build_graph import BuildGraph
+from output_writer import OutputWriter
+from wp_sources import RestSource, SourceError
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from image_cache import ImageCache
+from image_queue import ImageDownloadQueue, restore_remote_sources
+from response_cache import ResponseCache
+from html_rewriter import HtmlRewriter
+from html_minifier import minify_html
+from image_probe import ImageProbe, image_loading_attrs, add_image_attributes
+from metrics import metrics, add_metrics_arguments, instrumented
 
 class WordPressPageScraper:
-    def __init__(self, wp_url, output_dir="src/content"):
+    def __init__(self, wp_url, output_dir="src/content", max_workers=8, rate=DEFAULT_RATE,
+                 concurrency=DEFAULT_CONCURRENCY, minify=False):
         self.wp_url = wp_url.rstrip('/')
         self.output_dir = output_dir
+        self.max_workers = max_workers
         self.images_dir = "public/images"
         self.pages_dir = "src/pages"
+        # Minify scraped HTML (whitespace, comments, default attributes)
+        self.minify = minify
         
         # Create output directories
         os.makedirs(self.output_dir, exist_ok=True)
         os.makedirs(self.images_dir, exist_ok=True)
         os.makedirs(f"{self.output_dir}/posts", exist_ok=True)
         os.makedirs(f"{self.output_dir}/pages", exist_ok=True)
+        os.makedirs(self.pages_dir, exist_ok=True)
         
         # Headers to mimic a real browser
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+        # Pages and images share the origin, so one limiter paces both
+        self.concurrency = concurrency
+        self.rate_limiter = RateLimiter(rate, concurrency)
+        # Page fetches (up to `concurrency` threads) overlap the image downloads
+        # (`max_workers` threads), so the pool must hold connections for both
+        pool_size = max(max_workers, concurrency) + max_workers
+        self.session = create_session(pool_size=pool_size, headers=self.headers, rate_limiter=self.rate_limiter)
+        self.image_cache = ImageCache()
+        self.image_probe = ImageProbe()
+        self.image_queue = ImageDownloadQueue(self.image_cache, self.session, max_workers=self.max_workers)
+        self.response_cache = ResponseCache()
+        self.graph = BuildGraph()
+        self.writer = OutputWriter()
         
     def get_page_urls(self):
-        """Get all page URLs from the sitemap or by crawling"""
-        # First, let's get the pages from the API to get the slugs
-        api_url = f"{self.wp_url}/wp-json/wp/v2/pages"
-        response = requests.get(api_url, headers=self.headers)
-        
-        if response.status_code != 200:
-            print(f"❌ Error fetching pages from API: {response.status_code}")
-            return []
-        
-        pages = response.json()
+        """Get every page and post URL from the REST API, used when there is no sitemap"""
+        source = RestSource(f"{self.wp_url}/wp-json/wp/v2", self.session, self.concurrency)
         page_urls = []
-        
-        for page in pages:
-            slug = page.get('slug', '')
-            if slug:
+        for endpoint in ('pages', 'posts'):
+            # 'link' is the permalink, so nested pages keep their parent path
+            try:
+                items = source.fetch_collection(endpoint, endpoint, params={'_embed': None, '_fields': 'slug,link'})
+            except SourceError as e:
+                print(f"❌ Error listing {endpoint}: {e}")
+                continue
+            for item in items:
+                slug = item.get('slug', '')
                 if slug == 'home':
                     page_urls.append(self.wp_url)
-                else:
+                elif item.get('link'):
+                    page_urls.append(item['link'])
+                elif slug:
                     page_urls.append(f"{self.wp_url}/{slug}/")
         
         return page_urls
     
-    def download_image(self, image_url, filename):
-        """Download and save image"""
+    def discover_urls(self, frontier):
+        """Fill the frontier from the sitemaps, or the REST API without one, then close it"""
         try:
-            response = requests.get(image_url, headers=self.headers)
-            if response.status_code == 200:
-                # Create filename from URL
-                parsed_url = urlparse(image_url)
-                original_filename = os.path.basename(parsed_url.path)
-                name, ext = os.path.splitext(original_filename)
-                if not ext:
-                    ext = '.jpg'  # Default extension
-                
-                # Use provided filename or generate one
-                if not filename:
-                    filename = f"{slugify(name)}{ext}"
-                
-                filepath = os.path.join(self.images_dir, filename)
-                
-                # Save image
-                with open(filepath, 'wb') as f:
-                    f.write(response.content)
-                
-                return f"/images/{filename}"
-        except Exception as e:
-            print(f"❌ Error downloading image {image_url}: {e}")
-        
-        return image_url  # Return original URL if download fails
+            discovery = SitemapDiscovery(self.wp_url, self.session, self.concurrency)
+            if not discovery.discover(frontier) or not len(frontier):
+                print("🗺️  No sitemap found, listing pages and posts from the API")
+                for page_url in self.get_page_urls():
+                    frontier.add(page_url)
+        finally:
+            frontier.close()
     
-    def process_content(self, soup, page_url):
-        """Process the scraped content for Astro"""
-        # Process images
-        for img in soup.find_all('img'):
-            src = img.get('src')
-            if src:
-                # Make absolute URL
-                if src.startswith('//'):
-                    src = 'https:' + src
-                elif src.startswith('/'):
-                    src = self.wp_url + src
-                elif not src.startswith('http'):
-                    src = urljoin(page_url, src)
-                
-                # Download image and update src
-                filename = f"wp_{slugify(src.split('/')[-1])}"
-                new_src = self.download_image(src, filename)
-                img['src'] = new_src
+    def queue_image(self, image_url, filename):
+        """Queue an image download and return the local path it will be saved to"""
+        # Create filename from URL
+        parsed_url = urlparse(image_url)
+        original_filename = os.path.basename(parsed_url.path)
+        name, ext = os.path.splitext(original_filename)
+        if not ext:
+            ext = '.jpg'  # Default extension
         
-        # Process links to other pages
-        for link in soup.find_all('a'):
-            href = link.get('href')
-            if href and self.wp_url in href:
-                # Convert WordPress URLs to Astro URLs
-                link['href'] = href.replace(self.wp_url, '')
+        # Use provided filename or generate one
+        if not filename:
+            filename = f"{slugify(name)}{ext}"
         
-        return soup
+        filepath = os.path.join(self.images_dir, filename)
+        self.image_queue.submit(image_url, filepath)
+        
+        return f"/images/{filename}"
+    
+    def absolute_image_url(self, src, page_url):
+        """Make an <img> src absolute"""
+        if src.startswith('//'):
+            return 'https:' + src
+        if src.startswith('/'):
+            return self.wp_url + src
+        if not src.startswith('http'):
+            return urljoin(page_url, src)
+        return src
+    
+    def image_filename(self, src):
+        return f"wp_{slugify(src.split('/')[-1])}"
+    
+    def local_image_src(self, src, page_url, assets):
+        """Queue an <img> source for download and return its planned local path"""
+        src = self.absolute_image_url(src, page_url)
+        filename = self.image_filename(src)
+        assets.append((src, os.path.join(self.images_dir, filename)))
+        return self.queue_image(src, filename)
+    
+    def local_image_attrs(self, src, attrs, page_url):
+        """Add lazy loading to an <img>, its size comes after the downloads"""
+        return image_loading_attrs(attrs)
     
-    def scrape_page(self, page_url):
-        """Scrape a single page"""
+    def local_link_href(self, href):
+        """Convert WordPress URLs to Astro URLs"""
+        return href.replace(self.wp_url, '') if self.wp_url in href else href
+    
+    def scrape_page(self, page_url, conditional=False):
+        """Scrape a single page, revalidating against the response cache when conditional"""
         try:
             print(f"🔍 Scraping: {page_url}")
-            response = requests.get(page_url, headers=self.headers)
+            response = self.response_cache.get(self.session, page_url, conditional=conditional)
+            
+            if response.status_code == 304:
+                return {'url': page_url, 'not_modified': True}
             
             if response.status_code != 200:
                 print(f"❌ Error scraping {page_url}: {response.status_code}")
                 return None
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extract title
-            title_tag = soup.find('title')
-            title = title_tag.get_text().strip() if title_tag else "Untitled"
-            
-            # Remove common WordPress elements we don't want
-            for element in soup.find_all(['script', 'style', 'nav', 'footer', 'header']):
-                element.decompose()
-            
-            # Find the main content area
-            main_content = soup.find('main') or soup.find('article') or soup.find('div', class_=re.compile(r'content|main|post'))
-            
-            if not main_content:
-                # If no main content found, try to find the body content
-                main_content = soup.find('body')
-                if main_content:
-                    # Remove header, nav, footer
-                    for element in main_content.find_all(['header', 'nav', 'footer']):
-                        element.decompose()
-            
-            if main_content:
-                # Process the content
-                processed_soup = self.process_content(main_content, page_url)
-                content_html = str(processed_soup)
-            else:
-                content_html = str(soup)
+            # Parse once, strip chrome and rewrite the main content in one traversal
+            assets = []
+            rewriter = HtmlRewriter(
+                image_src=lambda src: self.local_image_src(src, page_url, assets),
+                link_href=self.local_link_href,
+                image_attrs=lambda src, attrs: self.local_image_attrs(src, attrs, page_url)
+            )
+            with metrics.timer('parse_seconds'):
+                page = rewriter.rewrite_document(response_html(response))
+            content = page['content']
+            if self.minify:
+                with metrics.timer('minify_seconds'):
+                    content = minify_html(content)
             
             return {
-                'title': title,
-                'content': content_html,
-                'url': page_url
+                'title': page['title'],
+                'content': content,
+                'url': page_url,
+                'assets': assets
             }
             
         except Exception as e:
             print(f"❌ Error scraping {page_url}: {e}")
+            metrics.increment('item_failures', kind='pages')
             return None
     
+    def page_slug(self, page_url):
+        """Return the slug for a page URL, with nested pages keeping their path (services/cooling)"""
+        return urlparse(page_url).path.strip('/') or 'home'
+    
+    def output_paths(self, slug):
+        """Return the markdown and Astro page paths written for `slug`"""
+        filepath = os.path.join(self.output_dir, 'pages', f"{slug}.md")
+        if slug == 'home':
+            astro_filepath = os.path.join(self.pages_dir, 'index.astro')
+        else:
+            astro_filepath = os.path.join(self.pages_dir, f"{slug}.astro")
+        return filepath, astro_filepath
+    
     def convert_to_astro_page(self, page_data, slug):
         """Convert scraped page data to Astro format"""
         title = page_data['title']
@@ -179,11 +212,8 @@ class WordPressPageScraper:
         astro_content += content
         
         # Save markdown file
-        filename = f"{slug}.md"
-        filepath = os.path.join(self.output_dir, 'pages', filename)
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(astro_content)
+        filepath, astro_filepath = self.output_paths(slug)
+        self.writer.write(filepath, astro_content)
         
         # Escape the title and content for Astro
         escaped_title = title.replace('"', '\\"').replace("'", "\\'")
@@ -198,54 +228,90 @@ description: ''
 <Layout>
   <div class="prose max-w-none">
     <h1>{escaped_title}</h1>
-    <div set:html={`{escaped_content}`} />
+    <div set:html={{`{escaped_content}`}} />
   </div>
 </Layout>
 """
         
         # Save Astro page file
-        if slug == 'home':
-            astro_filepath = os.path.join(self.pages_dir, 'index.astro')
-        else:
-            astro_filepath = os.path.join(self.pages_dir, f"{slug}.astro")
-        
-        with open(astro_filepath, 'w', encoding='utf-8') as f:
-            f.write(page_content)
+        self.writer.write(astro_filepath, page_content)
         
         return filepath, astro_filepath
     
+    def scrape_and_convert(self, page_url):
+        """Scrape one page and write its outputs unless it is unchanged"""
+        slug = self.page_slug(page_url)
+        
+        # Only revalidate when the previous outputs are still there to keep
+        outputs_exist = all(os.path.exists(path) for path in self.output_paths(slug))
+        page_data = self.scrape_page(page_url, conditional=outputs_exist)
+        if page_data and page_data.get('not_modified'):
+            print(f"   ⏭️  {page_url} not modified since last scrape, skipping")
+        elif page_data:
+            # Convert to Astro
+            md_path, astro_path = self.convert_to_astro_page(page_data, slug)
+            self.response_cache.commit(page_url)
+            self.graph.record(page_url, [md_path, astro_path], page_data['assets'])
+            print(f"   ✅ Created: {md_path}")
+            print(f"   ✅ Created: {astro_path}")
+    
     def run_scraping(self):
         """Run the complete scraping process"""
         print("🚀 Starting WordPress page scraping...")
         print(f"WordPress URL: {self.wp_url}")
         print(f"Output directory: {self.output_dir}")
         
-        # Get page URLs
-        page_urls = self.get_page_urls()
-        print(f"📊 Found {len(page_urls)} pages to scrape")
+        # Discovery fills the frontier while the workers scrape from it
+        frontier = CrawlFrontier()
+        metrics.stage('scrape_pages')
+        discovery = threading.Thread(target=self.discover_urls, args=(frontier,), daemon=True)
+        discovery.start()
+        
+        counter = {'scraped': 0}
+        counter_lock = threading.Lock()
+        
+        def scrape_worker():
+            for page_url in frontier:
+                with counter_lock:
+                    counter['scraped'] += 1
+                    i = counter['scraped']
+                print(f"\n📄 Scraping page {i}/{len(frontier)}: {page_url}")
+                try:
+                    with metrics.timer('item_seconds', kind='pages'):
+                        self.scrape_and_convert(page_url)
+                except Exception as e:
+                    print(f"❌ Error converting {page_url}: {e}")
+                    metrics.increment('item_failures', kind='pages')
         
-        if not page_urls:
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for _ in range(self.concurrency):
+                executor.submit(scrape_worker)
+        discovery.join()
+        
+        print(f"\n📊 Scraped {counter['scraped']} pages")
+        if not counter['scraped']:
             print("❌ No pages found to scrape")
             return
         
-        # Scrape each page
-        for i, page_url in enumerate(page_urls, 1):
-            print(f"\n📄 Scraping page {i}/{len(page_urls)}: {page_url}")
-            
-            page_data = self.scrape_page(page_url)
-            if page_data:
-                # Extract slug from URL
-                slug = page_url.replace(self.wp_url, '').strip('/')
-                if not slug:
-                    slug = 'home'
-                
-                # Convert to Astro
-                md_path, astro_path = self.convert_to_astro_page(page_data, slug)
-                print(f"   ✅ Created: {md_path}")
-                print(f"   ✅ Created: {astro_path}")
-            
-            # Be respectful - add a small delay
-            time.sleep(1)
+        # Every post-drain pass patches the writer's pending content, so each
+        # output reaches disk once, in a single flush
+        metrics.stage('download_images')
+        failures = self.image_queue.drain()
+        if failures:
+            restored = restore_remote_sources(failures, self.graph, self.writer)
+            print(f"   ↩️  Kept the remote URL of {len(failures)} images that failed to download, in {restored} files")
+        sized = add_image_attributes(self.image_probe, self.image_queue.completed, self.graph, self.writer)
+        if sized:
+            print(f"   📐 Added image sizes to {sized} files")
+        metrics.stage('write_outputs')
+        self.writer.flush()
+        print(f"\n💾 Output: {self.writer.summary()}")
+        metrics.stage('save_state')
+        self.image_cache.save()
+        self.image_probe.save()
+        self.response_cache.save()
+        self.graph.save()
+        metrics.stage()
         
         print("\n✅ Scraping complete!")
         print(f"\nNext steps:")
@@ -255,18 +321,27 @@ description: ''
         print(f"4. Customize the design and content as needed")
 
 def main():
-    import sys
-    
-    if len(sys.argv) < 2:
-        print("Usage: python3 scrape-converter.py <wordpress_url> [output_dir]")
-        print("Example: python3 scrape-converter.py https://example.com")
-        sys.exit(1)
+    import argparse
     
-    wp_url = sys.argv[1]
-    output_dir = sys.argv[2] if len(sys.argv) > 2 else "src/content"
+    parser = argparse.ArgumentParser(
+        description="Scrape rendered WordPress pages into Astro",
+        epilog="Example: python3 scrape-converter.py https://example.com"
+    )
+    parser.add_argument('wp_url', help="WordPress site URL")
+    parser.add_argument('output_dir', nargs='?', default="src/content", help="Content output directory")
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help=f"Requests per second to the site, 0 for no limit (default: {DEFAULT_RATE:g})")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Requests in flight at once (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument('--minify', action='store_true',
+                        help="Minify the scraped HTML: collapse whitespace, drop comments and default attributes")
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
     
-    scraper = WordPressPageScraper(wp_url, output_dir)
-    scraper.run_scraping()
+    scraper = WordPressPageScraper(args.wp_url, args.output_dir, rate=args.rate, concurrency=args.concurrency,
+                                   minify=args.minify)
+    with instrumented(args, 'scrape-converter'):
+        scraper.run_scraping()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+URL discovery for the page scraper
+Finds every public URL of a site from its XML sitemaps, read as streams so
+large sitemaps never sit in memory, and feeds them to a de-duplicated
+crawl frontier that scrape workers consume while discovery is still running
+"""
+
+import gzip
+import queue
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse, urlunparse
+from lxml import etree
+
+# Core WordPress, then the names Yoast/Rank Math and most other plugins use
+SITEMAP_PATHS = ('/wp-sitemap.xml', '/sitemap_index.xml', '/sitemap.xml')
+# Archive listings rather than content: taxonomy terms and author pages
+ARCHIVE_SITEMAP = re.compile(r'wp-sitemap-(?:taxonomies|users)-|(?:category|post_tag|tag|author)-sitemap')
+
+def normalize_url(url):
+    """Canonical form used for de-duplication: lower-case host, no fragment, '/' for an empty path"""
+    parts = urlparse(url.strip())
+    return urlunparse((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/', '', parts.query, ''))
+
+def iter_sitemap(stream):
+    """Yield ('sitemap' | 'url', loc) for each entry of a sitemap or sitemap index stream"""
+    for _, element in etree.iterparse(stream, events=('end',), recover=True, huge_tree=True):
+        if not isinstance(element.tag, str) or etree.QName(element).localname != 'loc':
+            continue
+        parent = element.getparent()
+        kind = etree.QName(parent).localname if parent is not None else ''
+        if element.text and kind in ('sitemap', 'url'):
+            yield kind, element.text.strip()
+
+        # Entries are independent, so drop each one once read
+        if parent is not None:
+            parent.clear()
+            while parent.getprevious() is not None:
+                del parent.getparent()[0]
+
+class CrawlFrontier:
+    """Thread-safe queue of URLs to scrape, each handed out once
+
+    Producers add() URLs as they are discovered and call close() when
+    discovery is finished; consumers iterate until it is closed and drained.
+    """
+
+    def __init__(self):
+        self.seen = set()
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+
+    def add(self, url):
+        """Queue `url` unless it was seen before, returning whether it was new"""
+        url = normalize_url(url)
+        with self.lock:
+            if url in self.seen:
+                return False
+            self.seen.add(url)
+        self.queue.put(url)
+        return True
+
+    def close(self):
+        self.queue.put(None)
+
+    def __iter__(self):
+        while True:
+            url = self.queue.get()
+            if url is None:
+                # Let every other consumer see the end too
+                self.queue.put(None)
+                return
+            yield url
+
+    def __len__(self):
+        return len(self.seen)
+
+class SitemapDiscovery:
+    def __init__(self, site_url, session, max_workers=4):
+        self.site_url = site_url.rstrip('/')
+        self.host = urlparse(self.site_url).netloc.lower()
+        self.session = session
+        self.max_workers = max_workers
+
+    def read_sitemap(self, sitemap_url, frontier):
+        """Stream one sitemap, adding its URLs to `frontier` as they are parsed
+
+        Returns the child sitemaps it lists, or None if there is no sitemap
+        at that URL.
+        """
+        children = []
+        try:
+            with self.session.get(sitemap_url, stream=True) as response:
+                if response.status_code != 200:
+                    return None
+                response.raw.decode_content = True
+                stream = response.raw
+                if urlparse(sitemap_url).path.endswith('.gz'):
+                    stream = gzip.GzipFile(fileobj=stream)
+                for kind, loc in iter_sitemap(stream):
+                    if urlparse(loc).netloc.lower() != self.host:
+                        continue
+                    if kind == 'url':
+                        frontier.add(loc)
+                    elif not ARCHIVE_SITEMAP.search(loc):
+                        children.append(loc)
+        except (OSError, etree.XMLSyntaxError) as e:
+            print(f"❌ Error reading sitemap {sitemap_url}: {e}")
+            return None
+        return children
+
+    def discover(self, frontier):
+        """Add every content URL in the site's sitemaps to `frontier`
+
+        Child sitemaps of an index are read concurrently and their URLs are
+        available to consumers as soon as they are parsed. Returns False if
+        the site has no sitemap at any of the usual locations.
+        """
+        for path in SITEMAP_PATHS:
+            children = self.read_sitemap(self.site_url + path, frontier)
+            if children is not None:
+                print(f"🗺️  Reading sitemap {self.site_url + path}")
+                break
+        else:
+            return False
+
+        seen_sitemaps = set()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = set()
+            while True:
+                for child in children:
+                    if child not in seen_sitemaps:
+                        seen_sitemaps.add(child)
+                        pending.add(executor.submit(self.read_sitemap, child, frontier))
+                if not pending:
+                    break
+                # Nested indexes are rare but allowed, so keep following children
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                children = [child for future in done for child in future.result() or []]
+        return True
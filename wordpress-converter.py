@@ -4,7 +4,6 @@ WordPress to Astro Conversion Script
 This script converts a WordPress site to Astro using the REST API
 """
 
-import requests
 import json
 import os
 import re
@@ -12,15 +11,75 @@ from datetime import datetime
 from urllib.parse import urljoin, urlparse
 from slugify import slugify
 from bs4 import BeautifulSoup
-from PIL import Image
-import io
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from http_client import create_session
+from image_cache import ImageCache
+from image_queue import ImageDownloadQueue, ImageCollector, restore_remote_sources
+from conversion_manifest import ConversionManifest
+from wp_sources import RestSource, LocalSource, WxrSource, SourceError
+from wp_lookup import LookupIndex
+from build_graph import BuildGraph
+from output_writer import OutputWriter, WriteCollector
+from html_rewriter import HtmlRewriter
+from html_minifier import minify_html
+from image_variants import ResponsiveImages
+from image_probe import ImageProbe, image_loading_attrs, add_image_attributes
+from metrics import metrics, add_metrics_arguments, instrumented
+
+# Fields the conversion actually reads, requested with --lean instead of _embed
+LEAN_FIELDS = {
+    'posts': 'id,date,modified,modified_gmt,slug,status,title,content,excerpt,author,categories,tags',
+    'pages': 'id,date,modified,modified_gmt,slug,status,title,content',
+    'categories': 'id,name,slug',
+    'tags': 'id,name,slug',
+    'users': 'id,name,slug',
+    'media': 'id,source_url,alt_text,media_details',
+}
 
 class WordPressToAstroConverter:
-    def __init__(self, wp_url, output_dir="src/content"):
+    def __init__(self, wp_url, output_dir="src/content", max_workers=8, incremental=False, source=None, workers=1,
+                 image_format=None, lean=False, minify=False):
         self.wp_url = wp_url.rstrip('/')
         self.api_url = f"{self.wp_url}/wp-json/wp/v2"
         self.output_dir = output_dir
+        self.max_workers = max_workers
+        self.incremental = incremental
+        # Request only LEAN_FIELDS and resolve authors/terms separately rather than _embed
+        self.lean = lean
+        # Minify converted HTML (whitespace, comments, default attributes)
+        self.minify = minify
+        # Processes used for the CPU-bound convert stage, max_workers is for HTTP
+        self.workers = workers
+        self.errors = []
+        self.manifest = ConversionManifest()
+        self.graph = BuildGraph()
+        self.writer = OutputWriter()
+        # (image_url, filepath) of images queued while converting the current item
+        self.item_assets = []
+        # Only reconvert items that depend on these assets, files or URLs when set
+        self.rebuild_targets = []
+        self.session = create_session(pool_size=max_workers)
+        # The live REST API unless an offline source is supplied
+        self.source = source or RestSource(self.api_url, self.session, max_workers)
+        self.lookup = LookupIndex(self.source, LEAN_FIELDS if lean else None)
+        self.image_cache = ImageCache()
+        self.image_probe = ImageProbe()
+        self.image_queue = ImageDownloadQueue(
+            self.image_cache,
+            max_workers=max_workers,
+            fetch_image=lambda image_url: self.source.fetch_image(self.image_cache, image_url)
+        )
         self.images_dir = "public/images"
+        # Responsive WebP/AVIF variants are opt-in, image_format None leaves images as downloaded
+        self.image_format = image_format
+        self.responsive_images = ResponsiveImages(self.images_dir, image_format) if image_format else None
+        self.rewriter = HtmlRewriter(
+            image_src=self.local_image_src,
+            link_href=self.local_link_href,
+            image_attrs=self.local_image_attrs
+        )
         self.pages_dir = "src/pages"
         
         # Create output directories
@@ -28,128 +87,108 @@ class WordPressToAstroConverter:
         os.makedirs(self.images_dir, exist_ok=True)
         os.makedirs(f"{self.output_dir}/posts", exist_ok=True)
         os.makedirs(f"{self.output_dir}/pages", exist_ok=True)
+        os.makedirs(self.pages_dir, exist_ok=True)
         
-    def fetch_posts(self, per_page=100):
-        """Fetch all posts from WordPress API"""
+    def collection_params(self, endpoint, modified_after):
+        params = {'modified_after': modified_after}
+        if self.lean:
+            params.update({'_embed': None, '_fields': LEAN_FIELDS[endpoint]})
+        return params
+
+    def fetch_posts(self, per_page=100, modified_after=None):
+        """Fetch all posts from WordPress API, optionally only those modified after a date"""
         print("📝 Fetching posts...")
-        posts = []
-        page = 1
-        
-        while True:
-            url = f"{self.api_url}/posts"
-            params = {
-                'per_page': per_page,
-                'page': page,
-                'status': 'publish',
-                '_embed': 'true'
-            }
-            
-            response = requests.get(url, params=params)
-            if response.status_code != 200:
-                print(f"❌ Error fetching posts: {response.status_code}")
-                break
-                
-            data = response.json()
-            if not data:
-                break
-                
-            posts.extend(data)
-            page += 1
-            print(f"   Fetched {len(posts)} posts so far...")
-            
-        return posts
-    
-    def fetch_pages(self, per_page=100):
-        """Fetch all pages from WordPress API"""
+        metrics.stage('fetch_posts')
+        return self.source.fetch_collection('posts', 'posts', per_page, self.collection_params('posts', modified_after))
+
+    def fetch_pages(self, per_page=100, modified_after=None):
+        """Fetch all pages from WordPress API, optionally only those modified after a date"""
         print("📄 Fetching pages...")
-        pages = []
-        page = 1
-        
-        while True:
-            url = f"{self.api_url}/pages"
-            params = {
-                'per_page': per_page,
-                'page': page,
-                'status': 'publish',
-                '_embed': 'true'
-            }
-            
-            response = requests.get(url, params=params)
-            if response.status_code != 200:
-                print(f"❌ Error fetching pages: {response.status_code}")
-                break
-                
-            data = response.json()
-            if not data:
-                break
-                
-            pages.extend(data)
-            page += 1
-            print(f"   Fetched {len(pages)} pages so far...")
-            
-        return pages
+        metrics.stage('fetch_pages')
+        return self.source.fetch_collection('pages', 'pages', per_page, self.collection_params('pages', modified_after))
+
+    def fetch_ids(self, endpoint):
+        """Fetch just the ids of every published item, used to detect deletions"""
+        items = self.source.fetch_collection(endpoint, f"{endpoint} ids", params={'_embed': None, '_fields': 'id'})
+        return [item['id'] for item in items]
+
+    def fetch_listing(self, kind, modified_after):
+        """Fetch posts or pages, returning (items, whether every item was listed)"""
+        fetch = self.fetch_posts if kind == 'posts' else self.fetch_pages
+        try:
+            return fetch(modified_after=modified_after), True
+        except SourceError as e:
+            print(f"❌ Error fetching {kind}: {e}")
+            return [], False
+    
+    def published_ids(self, kind, items, complete, modified_after):
+        """Ids of every published item of `kind`, or None when they can't be known for certain"""
+        if not complete:
+            return None
+        if not modified_after:
+            return [item.get('id') for item in items]
+        try:
+            return self.fetch_ids(kind)
+        except SourceError as e:
+            print(f"❌ Error listing {kind}: {e}")
+            return None
     
     def fetch_media(self, media_id):
-        """Fetch media details from WordPress API"""
-        url = f"{self.api_url}/media/{media_id}"
-        response = requests.get(url)
-        if response.status_code == 200:
-            return response.json()
-        return None
+        """Fetch media details, from the lookup index when already resolved"""
+        media = self.lookup.get('media', media_id)
+        if media is None:
+            media = self.source.fetch_media(media_id)
+            self.lookup.add('media', media)
+        return media
     
-    def download_image(self, image_url, filename):
-        """Download and save image"""
-        try:
-            response = requests.get(image_url)
-            if response.status_code == 200:
-                # Create filename from URL
-                parsed_url = urlparse(image_url)
-                original_filename = os.path.basename(parsed_url.path)
-                name, ext = os.path.splitext(original_filename)
-                if not ext:
-                    ext = '.jpg'  # Default extension
-                
-                # Use provided filename or generate one
-                if not filename:
-                    filename = f"{slugify(name)}{ext}"
-                
-                filepath = os.path.join(self.images_dir, filename)
-                
-                # Save image
-                with open(filepath, 'wb') as f:
-                    f.write(response.content)
-                
-                return f"/images/{filename}"
-        except Exception as e:
-            print(f"❌ Error downloading image {image_url}: {e}")
-        
-        return image_url  # Return original URL if download fails
+    def queue_image(self, image_url, filename):
+        """Queue an image download and return the local path it will be saved to"""
+        # Create filename from URL
+        parsed_url = urlparse(image_url)
+        original_filename = os.path.basename(parsed_url.path)
+        name, ext = os.path.splitext(original_filename)
+        if not ext:
+            ext = '.jpg'  # Default extension
+        
+        # Use provided filename or generate one
+        if not filename:
+            filename = f"{slugify(name)}{ext}"
+        
+        filepath = os.path.join(self.images_dir, filename)
+        self.image_queue.submit(image_url, filepath)
+        self.item_assets.append((image_url, filepath))
+        
+        return f"/images/{filename}"
+    
+    def absolute_image_url(self, src):
+        """Make an <img> src absolute, resolving relative ones against the site root"""
+        return urljoin(f"{self.wp_url}/", src)
+    
+    def image_filename(self, src):
+        return f"wp_{slugify(src.split('/')[-1])}"
+    
+    def local_image_src(self, src):
+        """Queue an <img> source for download and return its planned local path"""
+        src = self.absolute_image_url(src)
+        return self.queue_image(src, self.image_filename(src))
+    
+    def local_image_attrs(self, src, attrs):
+        """Add lazy loading to an <img>, its size and srcset come after the downloads"""
+        return image_loading_attrs(attrs)
+    
+    def local_link_href(self, href):
+        """Convert WordPress URLs to Astro URLs"""
+        # This is a basic implementation - you might want to customize this
+        return href.replace(self.wp_url, '') if self.wp_url in href else href
     
     def process_content(self, content):
-        """Process WordPress content for Astro"""
-        if not content:
-            return ""
-        
-        soup = BeautifulSoup(content, 'html.parser')
-        
-        # Process images
-        for img in soup.find_all('img'):
-            src = img.get('src')
-            if src:
-                # Download image and update src
-                filename = f"wp_{slugify(src.split('/')[-1])}"
-                new_src = self.download_image(src, filename)
-                img['src'] = new_src
-        
-        # Process links to other posts/pages
-        for link in soup.find_all('a'):
-            href = link.get('href')
-            if href and self.wp_url in href:
-                # Convert WordPress URLs to Astro URLs
-                # This is a basic implementation - you might want to customize this
-                link['href'] = href.replace(self.wp_url, '')
-        
-        return str(soup)
+        """Process WordPress content for Astro in a single lxml pass"""
+        with metrics.timer('parse_seconds'):
+            content = self.rewriter.rewrite_fragment(content)
+        if self.minify:
+            with metrics.timer('minify_seconds'):
+                content = minify_html(content)
+        return content
     
     def convert_post_to_astro(self, post):
         """Convert WordPress post to Astro format"""
@@ -163,19 +202,15 @@ class WordPressToAstroConverter:
         # Process content
         processed_content = self.process_content(content)
         
-        # Handle categories safely
-        categories = post.get('categories', [])
-        if isinstance(categories, list):
-            # If categories are just IDs, we'll need to fetch them separately
-            category_names = []
-            for cat in categories:
-                if isinstance(cat, dict):
-                    category_names.append(cat.get('name', ''))
-                else:
-                    # It's just an ID, we'll skip for now
-                    pass
-        else:
-            category_names = []
+        # Categories and tags are term objects once resolved by the lookup index
+        category_names = []
+        for field in ('categories', 'tags'):
+            terms = post.get(field, [])
+            if isinstance(terms, list):
+                for term in terms:
+                    # Unresolved ids are skipped
+                    if isinstance(term, dict) and term.get('name') and term['name'] not in category_names:
+                        category_names.append(term['name'])
         
         # Create frontmatter
         frontmatter = {
@@ -202,9 +237,7 @@ class WordPressToAstroConverter:
         # Save file
         filename = f"{slug}.md" if slug else f"post-{post.get('id', 'unknown')}.md"
         filepath = os.path.join(self.output_dir, 'posts', filename)
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(astro_content)
+        self.writer.write(filepath, astro_content)
         
         return filepath
     
@@ -235,9 +268,7 @@ class WordPressToAstroConverter:
         # Save file
         filename = f"{slug}.md" if slug else f"page-{page.get('id', 'unknown')}.md"
         filepath = os.path.join(self.output_dir, 'pages', filename)
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(astro_content)
+        self.writer.write(filepath, astro_content)
         
         return filepath
     
@@ -246,16 +277,24 @@ class WordPressToAstroConverter:
         print("📄 Creating Astro pages...")
         
         for page in pages:
-            slug = page.get('slug', '')
-            if not slug:
-                continue
-                
-            # Get page data safely
-            title = page.get('title', {}).get('rendered', '') if isinstance(page.get('title'), dict) else str(page.get('title', ''))
-            content = page.get('content', {}).get('rendered', '') if isinstance(page.get('content'), dict) else str(page.get('content', ''))
-            
-            # Create page file
-            page_content = f"""---
+            filepath = self.create_astro_page(page)
+            if filepath:
+                print(f"   Created: {filepath}")
+    
+    def create_astro_page(self, page):
+        """Create the Astro page file for one WordPress page and return its path"""
+        slug = page.get('slug', '')
+        if not slug:
+            return None
+        
+        # Get page data safely
+        title = page.get('title', {}).get('rendered', '') if isinstance(page.get('title'), dict) else str(page.get('title', ''))
+        content = page.get('content', {}).get('rendered', '') if isinstance(page.get('content'), dict) else str(page.get('content', ''))
+        if self.minify:
+            content = minify_html(content)
+        
+        # Create page file
+        page_content = f"""---
 title: {title}
 description: ''
 ---
@@ -267,44 +306,242 @@ description: ''
   </div>
 </Layout>
 """
-            
-            # Handle special pages
-            if slug == 'home':
-                filepath = os.path.join(self.pages_dir, 'index.astro')
+        
+        # Handle special pages
+        if slug == 'home':
+            filepath = os.path.join(self.pages_dir, 'index.astro')
+        else:
+            filepath = os.path.join(self.pages_dir, f"{slug}.astro")
+        
+        self.writer.write(filepath, page_content)
+        
+        return filepath
+    
+    def write_item(self, kind, item):
+        """Write the output files for one post or page and return their paths"""
+        with metrics.timer('item_seconds', kind=kind):
+            if kind == 'posts':
+                outputs = [self.convert_post_to_astro(item)]
             else:
-                filepath = os.path.join(self.pages_dir, f"{slug}.astro")
-            
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(page_content)
+                outputs = [self.convert_page_to_astro(item), self.create_astro_page(item)]
+        return [path for path in outputs if path]
+    
+    def item_source(self, kind, item_id):
+        """The REST URL an item comes from, its node in the build graph"""
+        return f"{self.api_url}/{kind}/{item_id}"
+    
+    def convert_item(self, kind, item):
+        """Convert one post or page, record it in the manifest and return its outputs"""
+        self.item_assets = []
+        outputs = self.write_item(kind, item)
+        self.manifest.record(kind, item, outputs)
+        self.graph.record(self.item_source(kind, item.get('id')), outputs, self.item_assets)
+        return outputs
+    
+    def convert_items(self, items):
+        """Convert (kind, item) pairs, in a process pool when workers > 1
+
+        Yields (kind, item, outputs) in input order so output, manifest and
+        progress stay deterministic. Failed items are collected in
+        self.errors and yield None outputs. At most workers * 4 items are in
+        flight, which keeps streaming sources streaming.
+        """
+        if self.workers <= 1:
+            for kind, item in items:
+                try:
+                    yield kind, item, self.convert_item(kind, item)
+                except Exception as e:
+                    yield kind, item, self.conversion_failed(kind, item, e)
+            return
+        
+        def finish(kind, item, future):
+            try:
+                outputs, images, writes, worker_metrics = future.result()
+            except Exception as e:
+                return kind, item, self.conversion_failed(kind, item, e)
+            metrics.merge(worker_metrics)
+            for path, content in writes:
+                self.writer.write(path, content)
+            for image_url, filepath in images:
+                self.image_queue.submit(image_url, filepath)
+            self.manifest.record(kind, item, outputs)
+            self.graph.record(self.item_source(kind, item.get('id')), outputs, images)
+            return kind, item, outputs
+        
+        # spawn rather than fork, the parent already runs download threads
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_worker,
+            initargs=(self.wp_url, self.output_dir, self.image_format, self.minify)
+        ) as pool:
+            in_flight = deque()
+            for kind, item in items:
+                in_flight.append((kind, item, pool.submit(convert_in_worker, kind, item)))
+                if len(in_flight) >= self.workers * 4:
+                    yield finish(*in_flight.popleft())
+            while in_flight:
+                yield finish(*in_flight.popleft())
+    
+    def conversion_failed(self, kind, item, error):
+        print(f"❌ Error converting {kind[:-1]} {item.get('id')}: {error}")
+        metrics.increment('item_failures', kind=kind)
+        self.errors.append((kind, item.get('id'), str(error)))
+        return None
+    
+    def remove_deleted(self, kind, live_ids):
+        """Remove outputs of items that are no longer published"""
+        for item_id, record in self.manifest.remove_missing(kind, live_ids).items():
+            self.graph.remove(self.item_source(kind, item_id))
+            print(f"   🗑️  Removed {kind[:-1]} {item_id}: {', '.join(record['outputs'])}")
+    
+    def convert_collections(self):
+        """Fetch posts and pages as lists and convert them"""
+        # Fetch content, only what changed since the last run when incremental
+        posts_since = self.manifest.last_modified('posts') if self.incremental else None
+        pages_since = self.manifest.last_modified('pages') if self.incremental else None
+        if posts_since or pages_since:
+            print(f"♻️  Incremental run: posts modified after {posts_since}, pages modified after {pages_since}")
+        posts, posts_complete = self.fetch_listing('posts', posts_since)
+        pages, pages_complete = self.fetch_listing('pages', pages_since)
+        
+        if self.incremental:
+            # Anything no longer published has its outputs removed, but only going by
+            # a complete listing so a failed request never reads as a deletion
+            for kind, items, complete, since in (('posts', posts, posts_complete, posts_since),
+                                                 ('pages', pages, pages_complete, pages_since)):
+                live_ids = self.published_ids(kind, items, complete, since)
+                if live_ids is None:
+                    print(f"⚠️  Not removing deleted {kind}, the listing is incomplete")
+                else:
+                    self.remove_deleted(kind, live_ids)
             
-            print(f"   Created: {filepath}")
+            posts = [post for post in posts if not self.manifest.is_current('posts', post)]
+            pages = [page for page in pages if not self.manifest.is_current('pages', page)]
+        
+        print(f"\n📊 Found {len(posts)} posts and {len(pages)} pages to convert")
+        
+        # Resolve term, author and media ids in bulk before converting
+        metrics.stage('resolve_ids')
+        self.lookup.resolve(posts + pages)
+        
+        # Convert posts
+        print("\n📝 Converting posts...")
+        metrics.stage('convert_posts')
+        for i, (_, post, outputs) in enumerate(self.convert_items(('posts', post) for post in posts), 1):
+            if outputs:
+                print(f"   [{i}/{len(posts)}] {outputs[0]}")
+        
+        # Convert pages and create their Astro page files
+        print("\n📄 Converting pages...")
+        metrics.stage('convert_pages')
+        for i, (_, page, outputs) in enumerate(self.convert_items(('pages', page) for page in pages), 1):
+            if outputs:
+                filepath, *astro_filepath = outputs
+                print(f"   [{i}/{len(pages)}] {filepath}")
+                for path in astro_filepath:
+                    print(f"   Created: {path}")
+    
+    def convert_stream(self):
+        """Convert items one at a time as a streaming source yields them"""
+        print("\n🌊 Streaming items from source...")
+        metrics.stage('convert_stream')
+        seen_ids = {'posts': set(), 'pages': set()}
+        converted = {'posts': 0, 'pages': 0}
+        
+        def changed_items():
+            for kind, item in self.source.iter_items():
+                seen_ids[kind].add(item.get('id'))
+                if not (self.incremental and self.manifest.is_current(kind, item)):
+                    yield kind, item
+        
+        for kind, item, outputs in self.convert_items(changed_items()):
+            if outputs:
+                converted[kind] += 1
+                print(f"   [{kind[:-1]} {converted[kind]}] {', '.join(outputs)}")
+        
+        # The export was read to the end, so anything not in it is gone
+        if self.incremental:
+            for kind, live_ids in seen_ids.items():
+                self.remove_deleted(kind, live_ids)
+        
+        print(f"\n📊 Converted {converted['posts']} posts and {converted['pages']} pages")
+    
+    def convert_dependents(self):
+        """Reconvert only the items that depend on self.rebuild_targets, per the build graph"""
+        ids = {'posts': set(), 'pages': set()}
+        for target in self.rebuild_targets:
+            for source in self.graph.dependents(target):
+                kind, _, item_id = source[len(self.api_url) + 1:].partition('/')
+                if source.startswith(self.api_url) and kind in ids and item_id.isdigit():
+                    ids[kind].add(int(item_id))
+        print(f"\n🎯 {len(ids['posts'])} posts and {len(ids['pages'])} pages depend on {', '.join(self.rebuild_targets)}")
+        metrics.stage('convert_dependents')
+        
+        if hasattr(self.source, 'iter_items'):
+            items = [(kind, item) for kind, item in self.source.iter_items() if item.get('id') in ids[kind]]
+        else:
+            items = []
+            for kind, wanted in ids.items():
+                if wanted:
+                    params = {**self.collection_params(kind, None), 'include': ','.join(map(str, sorted(wanted)))}
+                    try:
+                        fetched = self.source.fetch_collection(kind, kind, params=params)
+                    except SourceError as e:
+                        print(f"❌ Error fetching {kind}: {e}")
+                        continue
+                    items.extend((kind, item) for item in fetched if item.get('id') in wanted)
+        self.lookup.resolve([item for _, item in items])
+        
+        for kind, item, outputs in self.convert_items(items):
+            if outputs:
+                print(f"   [{kind[:-1]} {item.get('id')}] {', '.join(outputs)}")
     
     def run_conversion(self):
         """Run the complete conversion process"""
         print("🚀 Starting WordPress to Astro conversion...")
         print(f"WordPress URL: {self.wp_url}")
         print(f"Output directory: {self.output_dir}")
+        self.manifest.bind(self.source.identity)
         
-        # Fetch content
-        posts = self.fetch_posts()
-        pages = self.fetch_pages()
-        
-        print(f"\n📊 Found {len(posts)} posts and {len(pages)} pages")
-        
-        # Convert posts
-        print("\n📝 Converting posts...")
-        for i, post in enumerate(posts, 1):
-            filepath = self.convert_post_to_astro(post)
-            print(f"   [{i}/{len(posts)}] {filepath}")
+        # Streaming sources (WXR exports) never hold the whole site in memory
+        if self.rebuild_targets:
+            self.convert_dependents()
+        elif hasattr(self.source, 'iter_items'):
+            self.convert_stream()
+        else:
+            self.convert_collections()
         
-        # Convert pages
-        print("\n📄 Converting pages...")
-        for i, page in enumerate(pages, 1):
-            filepath = self.convert_page_to_astro(page)
-            print(f"   [{i}/{len(pages)}] {filepath}")
+        # Every post-drain pass patches the writer's pending content, so each
+        # output reaches disk once, in a single flush
+        metrics.stage('download_images')
+        failures = self.image_queue.drain()
+        if failures:
+            restored = restore_remote_sources(failures, self.graph, self.writer)
+            print(f"   ↩️  Kept the remote URL of {len(failures)} images that failed to download, in {restored} files")
+        if self.responsive_images:
+            metrics.stage('responsive_images')
+            self.responsive_images.generate(self.image_queue.completed)
+        metrics.stage('image_attributes')
+        sized = add_image_attributes(self.image_probe, self.image_queue.completed, self.graph, self.writer,
+                                     self.responsive_images)
+        if sized:
+            print(f"   📐 Added image sizes{' and srcsets' if self.responsive_images else ''} to {sized} files")
+        metrics.stage('write_outputs')
+        self.writer.flush()
+        print(f"\n💾 Output: {self.writer.summary()}")
+        metrics.stage('save_state')
+        self.image_cache.save()
+        self.image_probe.save()
+        self.manifest.save()
+        self.graph.save()
+        metrics.stage()
+        print(f"\n📦 Transferred: {self.session.transfer_summary()}")
         
-        # Create Astro page files
-        self.create_astro_pages(pages)
+        if self.errors:
+            print(f"\n⚠️  {len(self.errors)} items failed to convert:")
+            for kind, item_id, error in self.errors:
+                print(f"   {kind[:-1]} {item_id}: {error}")
         
         print("\n✅ Conversion complete!")
         print(f"\nNext steps:")
@@ -313,19 +550,69 @@ description: ''
         print(f"3. Run 'npm run dev' to preview your site")
         print(f"4. Customize the design and content as needed")
 
+# Per-process converter used by the --workers process pool
+worker_converter = None
+
+def init_worker(wp_url, output_dir, image_format, minify):
+    """Build this worker's converter, collecting image downloads for the parent"""
+    global worker_converter
+    worker_converter = WordPressToAstroConverter(wp_url, output_dir, max_workers=1, image_format=image_format,
+                                                 minify=minify)
+    worker_converter.image_queue = ImageCollector()
+    worker_converter.writer = WriteCollector()
+
+def convert_in_worker(kind, item):
+    """Convert one item in a worker and return its outputs, planned image downloads, file writes and metrics"""
+    try:
+        outputs = worker_converter.write_item(kind, item)
+    finally:
+        # Always empty the collectors so a failed item's images and files don't leak into the next
+        images = worker_converter.image_queue.take()
+        writes = worker_converter.writer.take()
+    return outputs, images, writes, metrics.take()
+
 def main():
-    import sys
-    
-    if len(sys.argv) < 2:
-        print("Usage: python3 wordpress-converter.py <wordpress_url> [output_dir]")
-        print("Example: python3 wordpress-converter.py https://example.com")
-        sys.exit(1)
+    import argparse
     
-    wp_url = sys.argv[1]
-    output_dir = sys.argv[2] if len(sys.argv) > 2 else "src/content"
+    parser = argparse.ArgumentParser(
+        description="Convert a WordPress site to Astro using the REST API",
+        epilog="Example: python3 wordpress-converter.py https://example.com"
+    )
+    parser.add_argument('wp_url', help="WordPress site URL")
+    parser.add_argument('output_dir', nargs='?', default="src/content", help="Content output directory")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Convert items in a pool of N processes (default: 1, no pool)")
+    parser.add_argument('--responsive-images', nargs='?', const='webp', choices=['webp', 'avif'],
+                        help="Generate resized variants (default format: webp) and add srcset/sizes to images")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only reconvert items modified since the last run and remove deleted ones")
+    parser.add_argument('--lean', action='store_true',
+                        help="Request only the fields the conversion uses (_fields) instead of _embed")
+    parser.add_argument('--minify', action='store_true',
+                        help="Minify the converted HTML: collapse whitespace, drop comments and default attributes")
+    parser.add_argument('--rebuild', action='append', default=[], metavar='TARGET',
+                        help="Only reconvert items that depend on TARGET (an image path or URL, output file or "
+                             "source URL) according to the build graph; repeatable")
+    parser.add_argument('--source-dir',
+                        help="Convert offline from saved REST JSON (e.g. public/wp-json) instead of the live API")
+    parser.add_argument('--wxr',
+                        help="Convert from a WordPress export (WXR) file, streamed item by item")
+    parser.add_argument('--uploads-dir',
+                        help="Local wp-content/uploads folder to read images from with --source-dir or --wxr")
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
     
-    converter = WordPressToAstroConverter(wp_url, output_dir)
-    converter.run_conversion()
+    converter = WordPressToAstroConverter(args.wp_url, args.output_dir, incremental=args.incremental, workers=args.workers,
+                                          image_format=args.responsive_images, lean=args.lean,
+                                          minify=args.minify)
+    if args.wxr:
+        converter.source = WxrSource(args.wxr, converter.session, args.uploads_dir)
+    elif args.source_dir:
+        converter.source = LocalSource(args.source_dir, args.uploads_dir)
+    converter.lookup = LookupIndex(converter.source, converter.lookup.fields)
+    converter.rebuild_targets = args.rebuild
+    with instrumented(args, 'wordpress-converter'):
+        converter.run_conversion()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Content sources for the WordPress to Astro converter
+A source supplies posts, pages and media in WordPress REST API shape and
+knows how to bring an image into the image cache, so the same conversion
+can run against a live site or an offline copy of one
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, unquote
+from lxml import etree
+
+class SourceError(Exception):
+    """Raised when a collection can't be read completely
+
+    Callers must not mistake a failed listing for an empty one, e.g. when
+    deciding which items were deleted.
+    """
+
+def upload_path(uploads_dir, image_url):
+    """Map a wp-content/uploads URL onto a local uploads tree, or None"""
+    if not uploads_dir:
+        return None
+    marker = '/wp-content/uploads/'
+    url_path = unquote(urlparse(image_url).path)
+    if marker not in url_path:
+        return None
+
+    relative = url_path.split(marker, 1)[1]
+    root = os.path.abspath(uploads_dir)
+    path = os.path.abspath(os.path.join(root, relative))
+    # Refuse anything that would escape the uploads tree
+    if not path.startswith(root + os.sep):
+        return None
+    return path
+
+class RestSource:
+    """Reads content from a live site's REST API"""
+
+    def __init__(self, api_url, session, max_workers=8):
+        self.api_url = api_url
+        self.session = session
+        self.max_workers = max_workers
+        # Recorded in the conversion manifest, see ConversionManifest.bind
+        self.identity = api_url
+
+    def fetch_collection(self, endpoint, label, per_page=100, params=None):
+        """Fetch every item of a REST collection, requesting pages in parallel
+
+        The first page is fetched on its own so the X-WP-TotalPages header
+        tells us exactly how many more requests to make; the rest are fetched
+        by a bounded worker pool and stitched back together in page order.
+        Entries in `params` override the defaults; a None value drops one.
+        Raises SourceError if any page can't be fetched.
+        """
+        url = f"{self.api_url}/{endpoint}"
+        params = {
+            'per_page': per_page,
+            'status': 'publish',
+            '_embed': 'true',
+            **(params or {})
+        }
+
+        def fetch_page(page):
+            response = self.session.get(url, params={**params, 'page': page})
+            if response.status_code != 200:
+                raise SourceError(f"{label} page {page} returned {response.status_code}")
+            return response.json()
+
+        response = self.session.get(url, params={**params, 'page': 1})
+        if response.status_code != 200:
+            raise SourceError(f"{label} returned {response.status_code}")
+
+        items = response.json()
+        total_pages = int(response.headers.get('X-WP-TotalPages', 1) or 1)
+        total_items = response.headers.get('X-WP-Total', len(items))
+        print(f"   Fetched page 1/{total_pages} ({total_items} {label} total)")
+
+        if total_pages > 1:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                # map() yields results in submission order, so items keep the API's ordering
+                for page, data in enumerate(executor.map(fetch_page, range(2, total_pages + 1)), 2):
+                    items.extend(data)
+                    print(f"   Fetched page {page}/{total_pages}, {len(items)} {label} so far...")
+
+        return items
+
+    def fetch_media(self, media_id):
+        """Fetch media details from WordPress API"""
+        response = self.session.get(f"{self.api_url}/media/{media_id}")
+        if response.status_code == 200:
+            return response.json()
+        return None
+
+    def fetch_image(self, image_cache, image_url):
+        """Download an image into the cache and return its digest"""
+        return image_cache.fetch(self.session, image_url)
+
+class LocalSource:
+    """Reads content from a directory of saved REST JSON and a local uploads tree
+
+    `json_dir` is laid out like the API, e.g. public/wp-json with one file per
+    item under wp/v2/pages/<id>; `uploads_dir` is a wp-content/uploads folder
+    that image URLs are mapped onto. No network access is made.
+    """
+
+    def __init__(self, json_dir, uploads_dir=None):
+        self.json_dir = json_dir
+        self.uploads_dir = uploads_dir
+        self.identity = os.path.abspath(json_dir)
+
+    def load_json(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def endpoint_dir(self, endpoint):
+        return os.path.join(self.json_dir, 'wp', 'v2', endpoint)
+
+    def fetch_collection(self, endpoint, label, per_page=100, params=None):
+        """Load every saved item of a collection, filtered like the REST API would
+
+        Raises SourceError if the collection wasn't saved or a file can't be read.
+        """
+        params = params or {}
+        directory = self.endpoint_dir(endpoint)
+        if not os.path.isdir(directory):
+            raise SourceError(f"no saved {label} in {directory}")
+
+        items = []
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if not os.path.isfile(path):
+                continue
+            try:
+                item = self.load_json(path)
+            except (OSError, ValueError) as e:
+                raise SourceError(f"can't read {path}: {e}") from e
+            if isinstance(item, list):
+                items.extend(item)
+            else:
+                items.append(item)
+
+        status = params.get('status', 'publish')
+        modified_after = params.get('modified_after')
+        include = params.get('include')
+        include = {int(item_id) for item_id in include.split(',')} if include else None
+        items = [
+            item for item in items
+            if (not status or item.get('status') == status)
+            and (not modified_after or item.get('modified', '') > modified_after)
+            and (include is None or item.get('id') in include)
+        ]
+
+        # Match the API's default ordering, newest first
+        items.sort(key=lambda item: (item.get('date', ''), item.get('id', 0)), reverse=True)
+        print(f"   Loaded {len(items)} {label} from {directory}")
+        return items
+
+    def fetch_media(self, media_id):
+        """Load saved media details"""
+        path = os.path.join(self.endpoint_dir('media'), str(media_id))
+        for candidate in (path, f"{path}.json"):
+            if os.path.isfile(candidate):
+                return self.load_json(candidate)
+        return None
+
+    def fetch_image(self, image_cache, image_url):
+        """Copy an image from the local uploads tree into the cache"""
+        path = upload_path(self.uploads_dir, image_url)
+        if not path or not os.path.isfile(path):
+            return None
+        return image_cache.fetch_file(image_url, path)
+
+class WxrSource:
+    """Streams posts and pages out of a WordPress export (WXR) file
+
+    The export is parsed incrementally with lxml's iterparse and every
+    <item> is discarded once converted, so memory stays flat no matter
+    how large the file is. Items carry the raw post_content stored in the
+    export rather than the filtered HTML the REST API renders.
+    """
+
+    ITEM_TYPES = {'post': 'posts', 'page': 'pages'}
+
+    def __init__(self, path, session=None, uploads_dir=None):
+        self.path = path
+        self.session = session
+        self.uploads_dir = uploads_dir
+        self.identity = os.path.abspath(path)
+        # Attachment URLs are small and needed for fetch_media lookups
+        self.attachments = {}
+
+    def iter_items(self):
+        """Yield ('posts' | 'pages', item) for each published item in file order"""
+        for _, element in etree.iterparse(self.path, events=('end',), tag='item', huge_tree=True):
+            item = self.parse_item(element)
+
+            # Free the finished item and everything parsed before it
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+            if item['type'] == 'attachment':
+                self.attachments[item['id']] = {'id': item['id'], 'source_url': item['attachment_url']}
+                continue
+            kind = self.ITEM_TYPES.get(item['type'])
+            if kind and item['status'] == 'publish':
+                yield kind, item
+
+    def parse_item(self, element):
+        """Turn one WXR <item> into the REST API shape the converter expects"""
+        fields = {}
+        terms = []
+        for child in element:
+            if not isinstance(child.tag, str):
+                continue
+            qname = etree.QName(child)
+            text = child.text or ''
+            if qname.localname == 'category' and child.get('domain') in ('category', 'post_tag'):
+                terms.append({'name': text, 'slug': child.get('nicename', '')})
+            elif qname.localname == 'encoded':
+                fields['excerpt' if '/excerpt/' in (qname.namespace or '') else 'content'] = text
+            else:
+                fields[qname.localname] = text
+
+        def iso(value):
+            # WXR uses "Y-m-d H:i:s"; unset GMT dates are all zeroes
+            return '' if not value or value.startswith('0000') else value.replace(' ', 'T')
+
+        return {
+            'id': int(fields.get('post_id') or 0),
+            'type': fields.get('post_type', ''),
+            'status': fields.get('status', ''),
+            'slug': fields.get('post_name', ''),
+            'date': iso(fields.get('post_date')),
+            'date_gmt': iso(fields.get('post_date_gmt')),
+            'modified': iso(fields.get('post_modified')),
+            'modified_gmt': iso(fields.get('post_modified_gmt')),
+            'title': {'rendered': fields.get('title', '')},
+            'content': {'rendered': fields.get('content', '')},
+            'excerpt': {'rendered': fields.get('excerpt', '')},
+            'categories': terms,
+            'attachment_url': fields.get('attachment_url', ''),
+            '_embedded': {'author': [{'name': fields.get('creator', '')}]},
+        }
+
+    def fetch_collection(self, endpoint, label, per_page=100, params=None):
+        """Collect one item type from the export, for callers that need a list"""
+        items = [item for kind, item in self.iter_items() if kind == endpoint]
+        print(f"   Loaded {len(items)} {label} from {self.path}")
+        return items
+
+    def fetch_media(self, media_id):
+        """Return an attachment seen earlier in the export"""
+        return self.attachments.get(int(media_id))
+
+    def fetch_image(self, image_cache, image_url):
+        """Read an image from the local uploads tree, falling back to the network"""
+        path = upload_path(self.uploads_dir, image_url)
+        if path and os.path.isfile(path):
+            return image_cache.fetch_file(image_url, path)
+        if self.session:
+            return image_cache.fetch(self.session, image_url)
+        return None